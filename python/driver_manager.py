@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Managed Selenium driver for long scraping runs
+Recycles Chrome after a number of pages or above a memory ceiling, and
+recovers from browser crashes by retrying the current unit of work on a
+fresh driver.
+"""
+
+import sys
+
+import job_scheduler
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+
+try:
+    import psutil
+except ImportError:  # Memory ceilings are disabled without psutil
+    psutil = None
+
+# Error message fragments chromedriver reports when the browser is gone
+CRASH_MARKERS = (
+    'invalid session id',
+    'session deleted',
+    'tab crashed',
+    'chrome not reachable',
+    'disconnected:',
+    'target window already closed',
+    'no such window',
+    'unable to receive message from renderer',
+)
+
+
+def is_driver_crash(error):
+    """
+    Check whether an exception means the browser session is dead
+
+    Args:
+        error: Exception raised by a WebDriver call
+
+    Returns:
+        True if the driver must be replaced before it can be used again
+    """
+    if isinstance(error, InvalidSessionIdException):
+        return True
+    if isinstance(error, ConnectionError):
+        # chromedriver process itself died (connection refused/reset)
+        return True
+    if type(error).__name__ in ('MaxRetryError', 'ProtocolError', 'NewConnectionError', 'ReadTimeoutError'):
+        return True
+    if isinstance(error, WebDriverException):
+        message = (error.msg or str(error)).lower()
+        return any(marker in message for marker in CRASH_MARKERS)
+    return False
+
+
+class ManagedDriver:
+    def __init__(self, factory, recycle_after=200, max_rss_mb=1500, max_crash_retries=1):
+        """
+        Wrap a driver factory with recycling and crash recovery
+
+        Args:
+            factory: Callable returning a new WebDriver instance
+            recycle_after: Restart the browser after this many pages (0 disables)
+            max_rss_mb: Restart when browser memory exceeds this many MB (0 disables)
+            max_crash_retries: How many times to retry a page on a fresh driver after a crash
+        """
+        self.factory = factory
+        self.recycle_after = recycle_after
+        self.max_rss_mb = max_rss_mb
+        self.max_crash_retries = max_crash_retries
+
+        self._driver = None
+        self._slot = None  # Host-wide browser slot held while a driver is running
+        self.pages_on_driver = 0
+        self.pages_total = 0
+        self.restarts = 0
+        self.crashes = 0
+        self.yields = 0  # Browsers given back to other jobs, not counted as restarts
+        self.peak_rss_mb = 0.0
+
+    @property
+    def driver(self):
+        """Current driver, started on first use (after waiting for a browser slot if a job is registered)"""
+        if self._driver is None:
+            scheduler = job_scheduler.current()
+            if scheduler is not None and self._slot is None:
+                self._slot = scheduler.acquire(job_scheduler.BROWSER)
+            try:
+                self._driver = self.factory()
+            except Exception:
+                self._release_slot()
+                raise
+            self.pages_on_driver = 0
+        return self._driver
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run one page worth of work against the driver
+
+        The callable must let crash exceptions propagate (see is_driver_crash).
+        On a crash the browser is replaced and the call retried.
+
+        Args:
+            func: Callable doing the work; it reads the driver via this manager
+            *args, **kwargs: Passed through to func
+
+        Returns:
+            Whatever func returns
+        """
+        attempt = 0
+        while True:
+            self.driver  # Make sure a browser is running
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_driver_crash(e):
+                    raise
+                self.crashes += 1
+                # Never keep a dead session around, even when giving up on this unit of work
+                self.restart()
+                if attempt >= self.max_crash_retries:
+                    raise
+                attempt += 1
+                print(f"WARNING: Browser crashed ({type(e).__name__}), retrying on a fresh driver", file=sys.stderr)
+                continue
+
+            self.pages_on_driver += 1
+            self.pages_total += 1
+            self._check_limits()
+            self._check_fair_share()
+            return result
+
+    def restart(self):
+        """Quit the current browser; the next access starts a new one"""
+        self.quit()
+        self.restarts += 1
+
+    def _check_limits(self):
+        """Recycle the browser when it has served too many pages or uses too much memory"""
+        rss_mb = self.memory_usage_mb()
+        if rss_mb is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+
+        if self.recycle_after and self.pages_on_driver >= self.recycle_after:
+            print(f"Recycling browser after {self.pages_on_driver} pages", file=sys.stderr)
+            self.restart()
+        elif self.max_rss_mb and rss_mb is not None and rss_mb > self.max_rss_mb:
+            print(f"Recycling browser at {rss_mb:.0f} MB (limit {self.max_rss_mb} MB)", file=sys.stderr)
+            self.restart()
+
+    def _check_fair_share(self):
+        """Give the browser slot back when other jobs are waiting and this job holds more than its share"""
+        scheduler = job_scheduler.current()
+        if self._driver is not None and scheduler is not None and scheduler.should_yield(job_scheduler.BROWSER):
+            print("Releasing browser to another waiting job", file=sys.stderr)
+            self.quit()
+            self.yields += 1
+
+    def _release_slot(self):
+        scheduler = job_scheduler.current()
+        if self._slot is not None and scheduler is not None:
+            scheduler.release(self._slot)
+        self._slot = None
+
+    def memory_usage_mb(self):
+        """Resident memory of chromedriver plus all browser processes, or None if unknown"""
+        if psutil is None or self._driver is None:
+            return None
+
+        try:
+            pid = self._driver.service.process.pid
+            root = psutil.Process(pid)
+            total = 0
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    total += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    def stats(self):
+        """Counters for run summaries"""
+        return {
+            "pagesLoaded": self.pages_total,
+            "driverRestarts": self.restarts,
+            "driverCrashes": self.crashes,
+            "fairShareYields": self.yields,
+            "peakRssMb": round(self.peak_rss_mb, 1),
+        }
+
+    def quit(self):
+        """Close the browser if one is running"""
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+        self._release_slot()
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive geographic tiling for Google Maps searches
+Splits a search area into square tiles searched by coordinates and zoom
+level instead of ZIP code. Tiles whose search comes back at the result cap
+are subdivided into four children; sibling tiles that turned out sparse are
+merged back into their parent the next time the area is planned.
+
+Tile keys encode the quadtree: the root "r" is a square around the whole
+area and each subdivision appends ".0"-".3" (NW, NE, SW, SE).
+"""
+
+import os
+import json
+import math
+from collections import namedtuple
+from urllib.parse import quote
+from lead_records import read_records
+
+Tile = namedtuple('Tile', ['key', 'latitude', 'longitude', 'size_km'])
+
+TILE_FIELDS = ["query", "google_maps_url", "business_type", "tile_key", "latitude", "longitude",
+               "size_km", "zoom", "city", "state", "country"]
+
+METERS_PER_PIXEL_Z0 = 156543.03392
+DEFAULT_VIEWPORT_PX = 800  # Map width visible next to the results panel
+
+
+def _lng_span(latitude, size_km):
+    return size_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+
+
+def _distance_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * 6371.0088 * math.asin(min(1.0, math.sqrt(a)))
+
+
+def tile_zoom(tile, viewport_px=DEFAULT_VIEWPORT_PX):
+    """Largest Maps zoom level at which the whole tile fits in the viewport"""
+    meters_per_px = tile.size_km * 1000 / viewport_px
+    zoom = math.log2(METERS_PER_PIXEL_Z0 * math.cos(math.radians(tile.latitude)) / meters_per_px)
+    return max(1, min(21, int(math.floor(zoom))))
+
+
+def tile_url(business_type, tile, viewport_px=DEFAULT_VIEWPORT_PX):
+    """Google Maps search URL centred on a tile"""
+    return (f"https://www.google.com/maps/search/{quote(business_type)}/"
+            f"@{tile.latitude:.6f},{tile.longitude:.6f},{tile_zoom(tile, viewport_px)}z?hl=en&gl=US")
+
+
+def grid_tiles(center_lat, center_lng, radius_km, tile_km):
+    """
+    Starting tiles covering a circular area
+
+    The root square around the circle is subdivided until tiles are at most
+    tile_km across; tiles entirely outside the circle are dropped.
+
+    Args:
+        center_lat: Latitude of the area centre
+        center_lng: Longitude of the area centre
+        radius_km: Radius of the area
+        tile_km: Maximum edge length of the starting tiles
+
+    Returns:
+        List of Tile
+    """
+    levels = max(0, int(math.ceil(math.log2(2 * radius_km / tile_km)))) if radius_km > 0 else 0
+    tiles = [Tile("r", center_lat, center_lng, tile_km * 2 ** levels)]
+    for _ in range(levels):
+        tiles = [child for tile in tiles for child in subdivide(tile)
+                 # Keep tiles that overlap the circle (centre within radius + half diagonal)
+                 if _distance_km(center_lat, center_lng, child.latitude, child.longitude)
+                 <= radius_km + child.size_km * 0.7072]
+    return tiles
+
+
+def subdivide(tile):
+    """Split a tile into its four quadrants"""
+    child_km = tile.size_km / 2
+    d_lat = child_km / 2 / 111.0
+    d_lng = _lng_span(tile.latitude, child_km / 2)
+    offsets = ((d_lat, -d_lng), (d_lat, d_lng), (-d_lat, -d_lng), (-d_lat, d_lng))
+    return [Tile(f"{tile.key}.{idx}", tile.latitude + o_lat, tile.longitude + o_lng, child_km)
+            for idx, (o_lat, o_lng) in enumerate(offsets)]
+
+
+def parent(tile):
+    """Rebuild a tile's parent from its geometry, or None for root tiles"""
+    if '.' not in tile.key:
+        return None
+    key, quadrant = tile.key.rsplit('.', 1)
+    quadrant = int(quadrant)
+    d_lat = tile.size_km / 2 / 111.0
+    lat = tile.latitude - d_lat if quadrant < 2 else tile.latitude + d_lat
+    d_lng = _lng_span(lat, tile.size_km / 2)
+    lng = tile.longitude + d_lng if quadrant % 2 == 0 else tile.longitude - d_lng
+    return Tile(key, lat, lng, tile.size_km * 2)
+
+
+def merge_sparse(tiles, history, sparse_below, saturation=None):
+    """
+    Replace groups of sibling tiles with their parent when the siblings'
+    recorded result counts add up to fewer than sparse_below
+
+    Siblings dropped for lying outside the area count as empty. A parent
+    that was itself recorded as saturated is never restored.
+    """
+    if not sparse_below:
+        return list(tiles)
+
+    current = list(tiles)
+    changed = True
+    while changed:
+        changed = False
+        groups = {}
+        for tile in current:
+            if '.' in tile.key:
+                groups.setdefault(tile.key.rsplit('.', 1)[0], []).append(tile)
+
+        for key, siblings in groups.items():
+            if any(tile.key not in history for tile in siblings):
+                continue
+            if sum(history[tile.key] for tile in siblings) >= sparse_below:
+                continue
+            if saturation and history.get(key, 0) >= saturation:
+                continue
+            merged = parent(siblings[0])
+            current = [tile for tile in current if tile not in siblings] + [merged]
+            history[merged.key] = sum(history[tile.key] for tile in siblings)
+            changed = True
+            break
+    return current
+
+
+def plan_tiles(roots, history, saturation, sparse_below=0, min_tile_km=0.5):
+    """
+    Choose the tiles to search using results recorded by earlier runs
+
+    Args:
+        roots: Starting tiles from grid_tiles
+        history: Dict of tile key -> result count from TileHistory
+        saturation: Result count at which a tile is considered capped
+        sparse_below: Merge sibling groups with fewer total results than this
+        min_tile_km: Never split tiles smaller than this
+
+    Returns:
+        List of Tile
+    """
+    leaves = []
+    stack = list(roots)
+    while stack:
+        tile = stack.pop()
+        if history.get(tile.key, 0) >= saturation and tile.size_km / 2 >= min_tile_km:
+            stack.extend(subdivide(tile))
+        else:
+            leaves.append(tile)
+    leaves.sort(key=lambda tile: tile.key)
+    return merge_sparse(leaves, dict(history), sparse_below, saturation)
+
+
+def tile_from_row(row):
+    """Rebuild a Tile from a query CSV row or JSON object"""
+    return Tile(row["tile_key"], float(row["latitude"]), float(row["longitude"]), float(row["size_km"]))
+
+
+def read_tile_rows(path):
+    """Read tile query rows written by the query generator's tile mode (CSV, Parquet or Arrow)"""
+    return read_records(path)
+
+
+class TileHistory:
+    def __init__(self, path=None):
+        """
+        Result counts per tile, optionally persisted as JSON
+
+        Keys are only meaningful for the centre, radius and tile size the
+        tiles were planned with, so use one history file per area.
+
+        Args:
+            path: JSON file to load from and save to
+        """
+        self.path = path
+        self.counts = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.counts = json.load(f)
+
+    def record(self, tile, count):
+        self.counts[tile.key] = count
+
+    def save(self):
+        """Write the counts (via a temporary file, so a crash never leaves half a file)"""
+        if self.path:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.counts, f)
+            os.replace(tmp_path, self.path)
+
+
+class TileRefiner:
+    def __init__(self, rows, history=None, saturation=20, min_tile_km=0.5):
+        """
+        Saturation-driven subdivision while a scrape is running
+
+        Args:
+            rows: Tile query rows from the query generator's tile mode
+            history: Optional TileHistory that receives each tile's result count
+            saturation: Result count at which a tile is considered capped
+            min_tile_km: Never split tiles smaller than this
+        """
+        self.history = history if history is not None else TileHistory()
+        self.saturation = saturation
+        self.min_tile_km = min_tile_km
+        self.subdivided = 0
+        self.tiles = {}
+        self.urls = []
+        for row in rows:
+            url = row["google_maps_url"]
+            self.tiles[url] = (tile_from_row(row), row.get("business_type", ""))
+            self.urls.append(url)
+
+    def expand(self, url, businesses, card_count):
+        """
+        Record a finished tile search and return the URLs of its quadrants
+        if the search came back at the result cap
+
+        The count is saved straight away, so a resumed run can still find
+        the quadrants of tiles finished before a crash (see pending).
+        """
+        if url not in self.tiles:
+            return []
+        tile, _ = self.tiles[url]
+        self.history.record(tile, card_count)
+        self.history.save()
+        children = self._children(url, card_count)
+        if children:
+            self.subdivided += 1
+        return children
+
+    def pending(self, completed):
+        """
+        Tile URLs still to search when resuming a run
+
+        Unfinished tiles are returned as they are; finished tiles whose
+        recorded count reached the cap are replaced by their quadrants,
+        recursively, so subdivisions cut short by a crash are completed.
+
+        Args:
+            completed: URLs already searched (e.g. from the result journal)
+        """
+        pending = []
+        stack = list(reversed(self.urls))
+        while stack:
+            url = stack.pop()
+            if url not in completed:
+                pending.append(url)
+                continue
+            tile, _ = self.tiles[url]
+            count = self.history.counts.get(tile.key)
+            if count is not None:
+                stack.extend(reversed(self._children(url, count)))
+        return pending
+
+    def _children(self, url, count):
+        """Quadrant URLs of a tile whose search returned count results (none if not saturated)"""
+        tile, business_type = self.tiles[url]
+        if count < self.saturation or tile.size_km / 2 < self.min_tile_km:
+            return []
+        children = []
+        for child in subdivide(tile):
+            child_url = tile_url(business_type, child)
+            self.tiles[child_url] = (child, business_type)
+            children.append(child_url)
+        return children
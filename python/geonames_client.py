@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Pooled, cached Geonames API client
+Reuses HTTP connections, caches responses on disk keyed by normalized
+parameters, and backs off when Geonames reports rate limiting or overload.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import job_scheduler
+
+GEONAMES_BASE_URL = "http://api.geonames.org/"
+
+# Geonames status codes (returned inside a 200 response) worth retrying:
+# 13 database timeout, 22 server overloaded
+RETRYABLE_STATUS = {13, 22}
+# 18 daily, 19 hourly and 20 weekly limit exceeded - seconds of backoff won't outlast them
+QUOTA_STATUS = {18, 19, 20}
+
+
+class GeonamesError(Exception):
+    """Geonames returned an error status message"""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class GeonamesClient:
+    def __init__(self, username, cache_path=None, ttl=30 * 24 * 3600, coordinate_grid=0.01,
+                 max_retries=4, max_backoff=30.0, pool_size=10):
+        """
+        Create a Geonames client
+
+        Args:
+            username: Geonames username
+            cache_path: SQLite file for the response cache (None disables caching)
+            ttl: Seconds a cached response stays valid
+            coordinate_grid: Coordinates are rounded to this many degrees so nearby
+                lookups share cache entries (0.01 is roughly 1km)
+            max_retries: Retries on database timeout/overload status messages (quota errors fail at once)
+            max_backoff: Longest single wait between retries, in seconds
+            pool_size: Connections kept open to the API host
+        """
+        self.username = username
+        self.ttl = ttl
+        self.coordinate_grid = coordinate_grid
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.hits = 0
+        self.misses = 0
+
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                      respect_retry_after_header=True)
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.lock = threading.Lock()
+        self.db = None
+        if cache_path:
+            cache_dir = os.path.dirname(cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            self.db = sqlite3.connect(cache_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, fetched_at REAL, body TEXT)"
+            )
+            self.db.commit()
+
+    def normalize_params(self, params):
+        """Round coordinates and canonicalize text so equivalent requests share a key"""
+        normalized = {}
+        for name, value in params.items():
+            if value is None:
+                continue
+            if name in ('lat', 'lng') and self.coordinate_grid:
+                grid = self.coordinate_grid
+                value = round(round(float(value) / grid) * grid, 6)
+            elif name in ('radius', 'maxRows'):
+                value = float(value) if name == 'radius' else int(value)
+                if name == 'radius' and value.is_integer():
+                    value = int(value)
+            elif isinstance(value, str):
+                value = ' '.join(value.split()).lower()
+            normalized[name] = value
+        return normalized
+
+    def _cache_key(self, endpoint, params):
+        return endpoint + '?' + json.dumps(params, sort_keys=True)
+
+    def _cache_get(self, key):
+        if self.db is None:
+            return None
+        with self.lock:
+            row = self.db.execute("SELECT fetched_at, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row and (not self.ttl or time.time() - row[0] < self.ttl):
+            return json.loads(row[1])
+        return None
+
+    def _cache_put(self, key, data):
+        if self.db is None:
+            return
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, fetched_at, body) VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(data))
+            )
+            self.db.commit()
+
+    def get(self, endpoint, params):
+        """
+        Call a Geonames JSON endpoint, serving repeats from the cache
+
+        Args:
+            endpoint: Endpoint name, e.g. "findNearbyPostalCodesJSON"
+            params: Query parameters (without username)
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            GeonamesError: Geonames reported an error status (after retries)
+            requests.RequestException: Network or HTTP failure
+        """
+        params = self.normalize_params(params)
+        key = self._cache_key(endpoint, params)
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        delay = 1.0
+        for attempt in range(self.max_retries + 1):
+            with job_scheduler.outbound(GEONAMES_BASE_URL):
+                response = self.session.get(GEONAMES_BASE_URL + endpoint,
+                                            params=dict(params, username=self.username), timeout=10)
+            response.raise_for_status()
+            data = response.json()
+
+            status = data.get("status") if isinstance(data, dict) else None
+            if not status:
+                self._cache_put(key, data)
+                return data
+
+            code = status.get("value")
+            message = status.get("message", "Unknown error")
+            if code in QUOTA_STATUS or code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                raise GeonamesError(message, code)
+
+            print(f"WARNING: Geonames busy ({message}), retrying in {delay:.0f}s", file=sys.stderr)
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+
+    def close(self):
+        """Close pooled connections and the cache database"""
+        self.session.close()
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+Host-wide job scheduler
+Every scraping or query job on the machine runs as its own Python process,
+so limits have to be shared between processes. Jobs register with a small
+SQLite database (in the temp directory by default) that tracks:
+
+    browser      concurrent Chrome instances across all jobs
+    connection   concurrent outbound HTTP/SMTP connections across all jobs
+    domains      earliest time the next request to each domain may start
+
+Waiting jobs are served by priority, then by how few slots they already
+hold, then first come first served, and a job holding more than its fair
+share of browsers gives one up after its current page when others wait.
+A job whose browsers depend on each other reserves them as one group, which
+is granted all at once or not at all.
+
+Settings (environment variables):
+    LEADFORGE_SCHEDULER           "off" disables the scheduler
+    LEADFORGE_SCHEDULER_DB        Path of the shared database
+    LEADFORGE_MAX_BROWSERS        Browser cap (default: by RAM and CPU count)
+    LEADFORGE_MAX_CONNECTIONS     Connection cap (default 32)
+    LEADFORGE_DOMAIN_INTERVAL     Minimum seconds between requests to one domain (default 0.5)
+"""
+
+import os
+import sys
+import time
+import uuid
+import atexit
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlparse
+
+try:
+    import psutil
+except ImportError:  # Falls back to CPU count for the browser cap and os.kill for liveness
+    psutil = None
+
+BROWSER = 'browser'
+CONNECTION = 'connection'
+
+POLL_INTERVAL = 0.2
+CLEANUP_INTERVAL = 5.0
+BROWSER_RAM_GB = 1.5  # Rough resident size of one scraping Chrome
+
+_current = None
+
+
+def default_browser_cap():
+    """Browsers the machine can run comfortably: one per 1.5 GB of RAM, at most one per CPU"""
+    cpus = os.cpu_count() or 2
+    if psutil is None:
+        return max(1, cpus // 2)
+    ram_gb = psutil.virtual_memory().total / (1024 ** 3)
+    return max(1, min(cpus, int(ram_gb / BROWSER_RAM_GB)))
+
+
+def _pid_alive(pid):
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if sys.platform == 'win32':
+        return True  # os.kill would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _host(url_or_host):
+    host = urlparse(url_or_host).hostname if '//' in url_or_host else url_or_host
+    host = (host or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class JobScheduler:
+    def __init__(self, name, priority=0, path=None, max_browsers=None, max_connections=None, domain_interval=None):
+        """
+        Register a job with the host-wide scheduler
+
+        Args:
+            name: Job name shown in the database (e.g. the script name)
+            priority: Higher priority jobs are served first when slots are scarce
+            path: Shared SQLite database (default LEADFORGE_SCHEDULER_DB or the temp directory)
+            max_browsers: Concurrent browsers allowed across all jobs
+            max_connections: Concurrent outbound connections allowed across all jobs
+            domain_interval: Minimum seconds between requests to the same domain
+        """
+        self.path = path or os.environ.get('LEADFORGE_SCHEDULER_DB') or os.path.join(
+            tempfile.gettempdir(), 'leadforge_scheduler.db')
+        self.caps = {
+            BROWSER: max_browsers or int(os.environ.get('LEADFORGE_MAX_BROWSERS', 0)) or default_browser_cap(),
+            CONNECTION: max_connections or int(os.environ.get('LEADFORGE_MAX_CONNECTIONS', 0)) or 32,
+        }
+        self.domain_interval = (domain_interval if domain_interval is not None
+                                else float(os.environ.get('LEADFORGE_DOMAIN_INTERVAL', 0.5)))
+        self.priority = priority
+        self.pid = os.getpid()
+        self.job_id = f"{name}-{self.pid}-{uuid.uuid4().hex[:8]}"
+        self.wait_seconds = 0.0
+        self._last_cleanup = 0.0
+        self._reserved = {}  # Resource -> reserved slot ids not currently in use
+        self._reserved_ids = {}  # Every reserved slot id -> resource
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, pid INTEGER, name TEXT, priority INTEGER,
+                                             started_at REAL);
+            CREATE TABLE IF NOT EXISTS holders (id INTEGER PRIMARY KEY AUTOINCREMENT, resource TEXT, job_id TEXT,
+                                                pid INTEGER, acquired_at REAL);
+            CREATE TABLE IF NOT EXISTS waiters (id INTEGER PRIMARY KEY AUTOINCREMENT, resource TEXT, job_id TEXT,
+                                                pid INTEGER, priority INTEGER, enqueued_at REAL,
+                                                slots INTEGER NOT NULL DEFAULT 1);
+            CREATE TABLE IF NOT EXISTS domains (domain TEXT PRIMARY KEY, next_at REAL);
+        """)
+        try:
+            # Databases created before group reservations lack the slots column
+            self.db.execute("ALTER TABLE waiters ADD COLUMN slots INTEGER NOT NULL DEFAULT 1")
+        except sqlite3.OperationalError:
+            pass
+        with self._transaction() as db:
+            db.execute("INSERT INTO jobs (id, pid, name, priority, started_at) VALUES (?, ?, ?, ?, ?)",
+                       (self.job_id, self.pid, name, priority, time.time()))
+
+    @contextmanager
+    def _transaction(self):
+        """Serialize against other threads and processes (BEGIN IMMEDIATE takes the write lock)"""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def _cleanup(self, db):
+        """Drop slots and queue entries left behind by processes that died"""
+        now = time.time()
+        if now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        pids = {row[0] for row in db.execute("SELECT pid FROM jobs UNION SELECT pid FROM holders "
+                                             "UNION SELECT pid FROM waiters")}
+        for pid in pids:
+            if pid != self.pid and not _pid_alive(pid):
+                for table in ('jobs', 'holders', 'waiters'):
+                    db.execute(f"DELETE FROM {table} WHERE pid = ?", (pid,))
+
+    def acquire(self, resource):
+        """
+        Wait for a slot of a resource (taken from this job's reservation if it has one)
+
+        Returns:
+            Slot id to pass to release()
+        """
+        with self.lock:
+            if self._reserved.get(resource):
+                return self._reserved[resource].pop()
+        return self._acquire(resource, 1)[0]
+
+    def _acquire(self, resource, count):
+        """Wait until count slots of a resource can be granted together; returns their ids"""
+        cap = self.caps[resource]
+        if count > cap:
+            raise ValueError(f"Cannot hold {count} {resource} slots at once (cap {cap})")
+        started = time.time()
+        with self._transaction() as db:
+            waiter_id = db.execute(
+                "INSERT INTO waiters (resource, job_id, pid, priority, enqueued_at, slots) VALUES (?, ?, ?, ?, ?, ?)",
+                (resource, self.job_id, self.pid, self.priority, started, count)
+            ).lastrowid
+
+        try:
+            while True:
+                with self._transaction() as db:
+                    self._cleanup(db)
+                    held = db.execute("SELECT COUNT(*) FROM holders WHERE resource = ?", (resource,)).fetchone()[0]
+                    free = cap - held
+                    # Priority first, then jobs holding the fewest slots, then arrival order. Waiters
+                    # are served in that order while their requests fit, so a group waiting for
+                    # several slots isn't overtaken forever by single requests behind it
+                    queue = db.execute(
+                        "SELECT w.id, w.slots FROM waiters w WHERE w.resource = ? ORDER BY w.priority DESC, "
+                        "(SELECT COUNT(*) FROM holders h WHERE h.job_id = w.job_id AND h.resource = w.resource), "
+                        "w.id", (resource,)).fetchall()
+                    for queued_id, slots in queue:
+                        if slots > free:
+                            break
+                        if queued_id == waiter_id:
+                            db.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+                            slot_ids = [db.execute(
+                                "INSERT INTO holders (resource, job_id, pid, acquired_at) VALUES (?, ?, ?, ?)",
+                                (resource, self.job_id, self.pid, time.time())
+                            ).lastrowid for _ in range(count)]
+                            waiter_id = None
+                            self.wait_seconds += time.time() - started
+                            return slot_ids
+                        free -= slots
+                time.sleep(POLL_INTERVAL)
+        finally:
+            if waiter_id is not None:
+                with self._transaction() as db:
+                    db.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+
+    def release(self, slot_id):
+        with self.lock:
+            resource = self._reserved_ids.get(slot_id)
+            if resource is not None:
+                self._reserved[resource].append(slot_id)  # Back to the reservation, not the host
+                return
+        if self.db is None:
+            return  # Already closed at exit, which released everything
+        with self._transaction() as db:
+            db.execute("DELETE FROM holders WHERE id = ?", (slot_id,))
+
+    @contextmanager
+    def slot(self, resource):
+        """Hold one slot of a resource for the duration of a with block"""
+        slot_id = self.acquire(resource)
+        try:
+            yield
+        finally:
+            self.release(slot_id)
+
+    @contextmanager
+    def reserve(self, resource, count):
+        """
+        Hold count slots of a resource for the duration of a with block
+
+        The slots are granted together or not at all, so two jobs can't each
+        end up with part of what they need and wait on each other. Inside the
+        block, acquire() and release() in this process use the reserved slots.
+        """
+        slot_ids = self._acquire(resource, count)
+        with self.lock:
+            self._reserved.setdefault(resource, []).extend(slot_ids)
+            self._reserved_ids.update((slot_id, resource) for slot_id in slot_ids)
+        try:
+            yield
+        finally:
+            with self.lock:
+                for slot_id in slot_ids:
+                    del self._reserved_ids[slot_id]
+                self._reserved[resource] = [slot_id for slot_id in self._reserved[resource] if slot_id not in slot_ids]
+            if self.db is not None:
+                with self._transaction() as db:
+                    db.executemany("DELETE FROM holders WHERE id = ?", [(slot_id,) for slot_id in slot_ids])
+
+    def should_yield(self, resource):
+        """
+        Whether this job holds more than its fair share of a resource while
+        other jobs are waiting for it (never for reserved slots, which are
+        held for the whole reservation)
+        """
+        with self.lock:
+            if resource in self._reserved_ids.values():
+                return False
+            waiting = self.db.execute("SELECT COUNT(*) FROM waiters WHERE resource = ? AND job_id != ?",
+                                      (resource, self.job_id)).fetchone()[0]
+            if not waiting:
+                return False
+            jobs = self.db.execute("SELECT COUNT(DISTINCT job_id) FROM (SELECT job_id FROM holders WHERE resource = ? "
+                                   "UNION SELECT job_id FROM waiters WHERE resource = ?)",
+                                   (resource, resource)).fetchone()[0]
+            mine = self.db.execute("SELECT COUNT(*) FROM holders WHERE resource = ? AND job_id = ?",
+                                   (resource, self.job_id)).fetchone()[0]
+        return mine > max(1, self.caps[resource] // max(1, jobs))
+
+    def throttle(self, url_or_host):
+        """Wait until a request to this domain is allowed, reserving the next turn"""
+        domain = _host(url_or_host)
+        if not domain or not self.domain_interval:
+            return
+        with self._transaction() as db:
+            row = db.execute("SELECT next_at FROM domains WHERE domain = ?", (domain,)).fetchone()
+            now = time.time()
+            start = max(now, row[0] if row else 0.0)
+            db.execute("INSERT OR REPLACE INTO domains (domain, next_at) VALUES (?, ?)",
+                       (domain, start + self.domain_interval))
+        if start > now:
+            self.wait_seconds += start - now
+            time.sleep(start - now)
+
+    def close(self):
+        """Unregister the job, releasing anything it still holds"""
+        if self.db is None:
+            return
+        with self._transaction() as db:
+            for table, column in (('jobs', 'id'), ('holders', 'job_id'), ('waiters', 'job_id')):
+                db.execute(f"DELETE FROM {table} WHERE {column} = ?", (self.job_id,))
+        self.db.close()
+        self.db = None
+
+
+def register_job(name, priority=0, **options):
+    """
+    Register this process's job with the host-wide scheduler
+
+    Browsers, connections and domain request rates used by the scrapers in
+    this process are then coordinated with every other registered job.
+    Does nothing when LEADFORGE_SCHEDULER is "off".
+
+    Returns:
+        The JobScheduler, or None when disabled
+    """
+    global _current
+    if os.environ.get('LEADFORGE_SCHEDULER', '').lower() == 'off':
+        return None
+    if _current is None:
+        _current = JobScheduler(name, priority=priority, **options)
+        atexit.register(_current.close)
+    return _current
+
+
+def current():
+    """The scheduler registered by this process, if any"""
+    return _current
+
+
+def outbound(url_or_host):
+    """
+    Context manager for one outbound connection: waits for the domain's turn
+    and a connection slot (no-op when no job is registered)
+    """
+    if _current is None:
+        return nullcontext()
+    _current.throttle(url_or_host)
+    return _current.slot(CONNECTION)
+
+
+def throttle(url_or_host):
+    """Wait for the domain's turn (no-op when no job is registered)"""
+    if _current is not None:
+        _current.throttle(url_or_host)
+
+
+def wait_seconds():
+    """Time this process has spent queued behind other jobs, for run summaries"""
+    return round(_current.wait_seconds, 1) if _current is not None else 0
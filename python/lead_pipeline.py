@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming Lead Pipeline
+Scrapes Google Maps searches and feeds every business with a website straight
+into email scraping, so both phases run at the same time and results land in
+one combined CSV.
+"""
+
+import sys
+import io
+
+# Fix Unicode encoding issues on Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+from contextlib import ExitStack
+
+from scrape_google_maps import BUSINESS_FIELDS, read_urls_from_csv, scrape_urls
+from scrape_emails import EmailScraper
+from place_index import PlaceIndex
+from scrape_history import ScrapeHistory, DEFAULT_FRESH_DAYS
+from lead_records import RecordWriter
+from origin_cache import OriginCache
+from page_archive import PageArchive
+import job_scheduler
+
+PIPELINE_FIELDS = BUSINESS_FIELDS + ['email']
+
+
+def has_website(business):
+    """Check whether a scraped business has a website worth visiting"""
+    website = (business.get('website') or '').strip()
+    return website not in ('', 'N/A')
+
+
+def run_pipeline(urls, output_file, max_results=20, maps_pool_size=1, email_workers=2, queue_size=50,
+                 delay=2.0, use_selenium=True, verify_emails=True, headless=True, dedupe=True,
+                 history_file=None, fresh_days=DEFAULT_FRESH_DAYS, origin_cache_file=None, archive_file=None):
+    """
+    Scrape Maps searches and their businesses' emails concurrently
+
+    As each Maps search finishes, its businesses with a website go onto a
+    bounded queue; email workers drain the queue in parallel. A full queue
+    blocks the Maps side until email scraping catches up.
+
+    Args:
+        urls: Google Maps search URLs
+        output_file: Path to the combined output file (.parquet / .arrow for columnar, otherwise CSV)
+        max_results: Maximum businesses per search
+        maps_pool_size: Number of browsers scraping Maps in parallel
+        email_workers: Number of EmailScraper consumers
+        queue_size: Maximum businesses waiting for email scraping
+        delay: Delay in seconds between websites on each email worker
+        use_selenium: Use Selenium for email scraping (slower but more thorough)
+        verify_emails: Verify emails exist using SMTP
+        headless: Run browsers in headless mode
+        dedupe: Skip places already returned by an overlapping search
+        history_file: Optional scrape history database; searches and websites
+            scraped within fresh_days days are reused instead of scraped
+        fresh_days: Freshness window for history_file, in days
+        origin_cache_file: Optional SQLite file persisting each site's post-redirect
+            origin between runs; websites are written as canonical URLs
+        archive_file: Optional page archive path for offline re-extraction
+
+    Returns:
+        Dictionary of run statistics
+    """
+    scheduler = job_scheduler.current()
+    if scheduler is not None:
+        # Maps workers and Selenium email workers each hold a browser while blocked on the
+        # queue, so together they must fit under the host-wide cap (and are reserved together below)
+        browser_cap = scheduler.caps[job_scheduler.BROWSER]
+        if use_selenium and browser_cap < 2:
+            print("⚠️  Browser cap is 1: email scraping falls back to requests", file=sys.stderr)
+            use_selenium = False
+        maps_pool_size = max(1, min(maps_pool_size, browser_cap - (1 if use_selenium else 0)))
+        if use_selenium:
+            email_workers = max(1, min(email_workers, browser_cap - maps_pool_size))
+
+    work = queue.Queue(maxsize=queue_size)
+    history = ScrapeHistory(history_file, fresh_days) if history_file else None
+    origins = OriginCache(origin_cache_file)
+    archive = PageArchive(archive_file) if archive_file else None
+    write_lock = threading.Lock()
+    stats = {
+        "searches": len(urls),
+        "businesses": 0,
+        "websitesScraped": 0,
+        "emailsFound": 0,
+        "errors": 0,
+        "websitesSkipped": 0,
+    }
+
+    writer = RecordWriter(output_file, PIPELINE_FIELDS)
+
+    def write_row(business, email):
+        with write_lock:
+            writer.write(dict(business, email=email))
+            writer.flush()
+            stats["businesses"] += 1
+
+    def email_worker():
+        try:
+            scraper = EmailScraper(headless=True, use_selenium=use_selenium, origin_cache=origins, archive=archive)
+        except Exception as e:
+            print(f"❌ Email worker could not start: {str(e)}", file=sys.stderr)
+            return
+        try:
+            while True:
+                business = work.get()
+                if business is None:
+                    break
+
+                cached = history.get_domain(business['website']) if history is not None else None
+                if cached is not None:
+                    emails = cached
+                    business = dict(business, website=origins.canonical_url(business['website']))
+                else:
+                    try:
+                        emails = scraper.scrape_website(business['website'], verify_emails=verify_emails)
+                        # A site that didn't load isn't "no email"; try it again next run
+                        if history is not None and scraper.last_fetched:
+                            history.record_domain(business['website'], emails)
+                        business = dict(business, website=scraper.last_url)
+                    except Exception as e:
+                        print(f"⚠️  Error scraping {business['website']}: {str(e)}", file=sys.stderr)
+                        emails = 'N/A'
+                        with write_lock:
+                            stats["errors"] += 1
+
+                with write_lock:
+                    stats["websitesScraped"] += 1
+                    if emails != 'N/A':
+                        stats["emailsFound"] += 1
+                write_row(business, emails)
+
+                # Be respectful - add delay
+                if cached is None:
+                    time.sleep(delay)
+        finally:
+            scraper.close()
+
+    def enqueue(item):
+        """Queue an item for the email workers; False once none of them is left to take it"""
+        while any(consumer.is_alive() for consumer in consumers):
+            try:
+                work.put(item, timeout=1)  # Blocks while email scraping is behind
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def write_unscraped(business):
+        """Keep a business whose website can no longer be scraped, without emails"""
+        with write_lock:
+            if not stats["websitesSkipped"]:
+                print("⚠️  No email worker left; writing businesses without emails", file=sys.stderr)
+            stats["websitesSkipped"] += 1
+        write_row(business, 'N/A')
+
+    def on_result(url, businesses):
+        for business in businesses:
+            if not has_website(business):
+                write_row(business, 'N/A')
+            elif not enqueue(business):
+                write_unscraped(business)
+
+    def on_progress(completed, total, business_count, businesses):
+        print(json.dumps({"status": "scraping", "current": completed, "total": total,
+                          "count": business_count, "queued": work.qsize()}), file=sys.stderr)
+
+    def on_error(url, error):
+        print(json.dumps({"error": str(error), "url": url}), file=sys.stderr)
+
+    # Reserve every browser this run needs at once: holding only the Maps ones while another
+    # job holds the rest would leave both waiting on each other
+    reservation = ExitStack()
+    if scheduler is not None:
+        browsers = maps_pool_size + (email_workers if use_selenium else 0)
+        reservation.enter_context(scheduler.reserve(job_scheduler.BROWSER, browsers))
+
+    consumers = [threading.Thread(target=email_worker, daemon=True) for _ in range(max(1, email_workers))]
+    for consumer in consumers:
+        consumer.start()
+
+    place_index = PlaceIndex() if dedupe else None
+    try:
+        _, driver_stats = scrape_urls(
+            urls,
+            max_results=max_results,
+            pool_size=maps_pool_size,
+            headless=headless,
+            place_index=place_index,
+            keep_results=False,
+            on_result=on_result,
+            on_progress=on_progress,
+            on_error=on_error,
+            history=history
+        )
+    finally:
+        # One sentinel per consumer, then wait for the queue to drain
+        for _ in consumers:
+            if not enqueue(None):
+                break
+        for consumer in consumers:
+            consumer.join()
+        # Anything still queued was left behind by email workers that died
+        while not work.empty():
+            business = work.get_nowait()
+            if business is not None:
+                write_unscraped(business)
+        writer.close()
+        if history is not None:
+            history.close()
+        origins.close()
+        if archive is not None:
+            archive.close()
+        reservation.close()
+
+    stats["driverRestarts"] = driver_stats["driverRestarts"]
+    stats["fairShareYields"] = driver_stats["fairShareYields"]
+    stats["duplicatesSkipped"] = place_index.duplicates if place_index is not None else 0
+    stats["searchesFromHistory"] = history.search_hits if history is not None else 0
+    stats["domainsFromHistory"] = history.domain_hits if history is not None else 0
+    stats["schedulerWaitSeconds"] = job_scheduler.wait_seconds()
+    stats["successRate"] = round(stats["emailsFound"] / stats["websitesScraped"] * 100, 1) if stats["websitesScraped"] > 0 else 0
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Scrape Google Maps searches and business emails in one streaming run')
+    parser.add_argument('input_file', help='Query generator file with a google_maps_url (or "Google Maps URL") column')
+    parser.add_argument('--output', '-o', help='Path to combined output file (.parquet / .arrow for columnar, otherwise CSV)', default=None)
+    parser.add_argument('--max-results', type=int, help='Maximum businesses per search', default=20)
+    parser.add_argument('--maps-pool', type=int, help='Browsers scraping Maps in parallel', default=1)
+    parser.add_argument('--email-workers', type=int, help='Parallel email scrapers', default=2)
+    parser.add_argument('--queue-size', type=int, help='Businesses buffered between the two phases', default=50)
+    parser.add_argument('--delay', '-d', type=float, help='Delay between websites per email worker (seconds)', default=2.0)
+    parser.add_argument('--selenium', '-s', action='store_true', help='Use Selenium for email scraping (slower but more thorough)')
+    parser.add_argument('--fast', action='store_true', help='Use requests only for email scraping (faster but may miss emails)')
+    parser.add_argument('--no-verify', action='store_true', help='Skip email verification (faster but less accurate)')
+    parser.add_argument('--show-browser', action='store_true', help='Show the Maps browser window')
+    parser.add_argument('--no-dedupe', action='store_true', help='Keep duplicate places from overlapping searches')
+    parser.add_argument('--history-file', help='Scrape history database; skips recently scraped searches and websites', default=None)
+    parser.add_argument('--fresh-days', type=float, help='Reuse history results younger than this many days', default=DEFAULT_FRESH_DAYS)
+    parser.add_argument('--origin-cache', help='SQLite file remembering where each site redirects to, reused across runs', default=None)
+    parser.add_argument('--archive', help='Append fetched pages to this archive for offline re-extraction', default=None)
+    parser.add_argument('--priority', type=int, help='Scheduling priority against other jobs on this machine (higher first)', default=0)
+
+    args = parser.parse_args()
+
+    # Share browsers, connections and request rates with other jobs on this machine
+    job_scheduler.register_job('lead_pipeline', priority=args.priority)
+    root, ext = os.path.splitext(args.input_file)
+    output_file = args.output or f"{root}_leads{ext}"
+
+    try:
+        urls = read_urls_from_csv(args.input_file)
+    except FileNotFoundError:
+        print(f"❌ Error: Could not find file '{args.input_file}'", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"🚀 Pipeline: {len(urls)} searches → {output_file}")
+    stats = run_pipeline(
+        urls,
+        output_file,
+        max_results=args.max_results,
+        maps_pool_size=args.maps_pool,
+        email_workers=args.email_workers,
+        queue_size=args.queue_size,
+        delay=args.delay,
+        use_selenium=args.selenium or not args.fast,
+        verify_emails=not args.no_verify,
+        headless=not args.show_browser,
+        dedupe=not args.no_dedupe,
+        history_file=args.history_file,
+        fresh_days=args.fresh_days,
+        origin_cache_file=args.origin_cache,
+        archive_file=args.archive
+    )
+
+    print("\n" + "=" * 60)
+    print("PIPELINE SUMMARY")
+    print("=" * 60)
+    print(f"Searches:                {stats['searches']}")
+    print(f"Businesses:              {stats['businesses']}")
+    print(f"Websites scraped:        {stats['websitesScraped']}")
+    print(f"✅ Emails found:         {stats['emailsFound']} ({stats['successRate']}%)")
+    print(f"⚠️  Errors:               {stats['errors']}")
+    if stats['websitesSkipped']:
+        print(f"⏭️  Not email-scraped:    {stats['websitesSkipped']}")
+    print("=" * 60)
+    print(f"\nJSON_STATS:{json.dumps(stats)}")
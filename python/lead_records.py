@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+Typed lead records and columnar lead files
+Leads are held as slotted records or in an array-backed LeadTable instead of
+one dict per business, with missing values as None rather than 'N/A'
+strings. Files ending in .parquet or .arrow are read and written as
+columnar Parquet / Arrow IPC (requires pyarrow); anything else stays CSV.
+"""
+
+import os
+import sys
+import csv
+import math
+from array import array
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar formats are unavailable without pyarrow; CSV still works
+    pa = None
+
+LEAD_FIELDS = ['name', 'phone', 'website', 'rating', 'reviews', 'address', 'category', 'place_url', 'email']
+TEXT_FIELDS = [field for field in LEAD_FIELDS if field not in ('rating', 'reviews')]
+
+MISSING = 'N/A'
+COLUMNAR_EXTENSIONS = ('.parquet', '.arrow')
+BATCH_ROWS = 10000  # Rows buffered per Parquet row group / Arrow record batch
+
+
+def is_columnar(path):
+    """Whether a path names a Parquet or Arrow IPC file"""
+    return os.path.splitext(path)[1].lower() in COLUMNAR_EXTENSIONS
+
+
+def _require_pyarrow(path):
+    if pa is None:
+        raise RuntimeError(f"Writing or reading {path} needs pyarrow (pip install pyarrow)")
+
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    value = str(value).strip()
+    return None if value in ('', MISSING) else value
+
+
+def _float(value):
+    if isinstance(value, (int, float)):
+        return None if isinstance(value, float) and math.isnan(value) else float(value)
+    value = _text(value)
+    try:
+        return float(value.replace(',', '.')) if value else None
+    except ValueError:
+        return None
+
+
+def _int(value):
+    if isinstance(value, (int, float)):
+        return None if isinstance(value, float) and math.isnan(value) else int(value)
+    value = _text(value)
+    digits = ''.join(ch for ch in value if ch.isdigit()) if value else ''
+    return int(digits) if digits else None
+
+
+class Lead:
+    """One business, with typed rating/reviews and None for missing values"""
+    __slots__ = LEAD_FIELDS
+
+    def __init__(self, name=None, phone=None, website=None, rating=None, reviews=None, address=None,
+                 category=None, place_url=None, email=None):
+        self.name = name
+        self.phone = phone
+        self.website = website
+        self.rating = rating
+        self.reviews = reviews
+        self.address = address
+        self.category = category
+        self.place_url = place_url
+        self.email = email
+
+    @classmethod
+    def from_dict(cls, row):
+        """Build a Lead from a scraped business dict or CSV row ('N/A' becomes None)"""
+        return cls(rating=_float(row.get('rating')), reviews=_int(row.get('reviews')),
+                   **{field: _text(row.get(field)) for field in TEXT_FIELDS})
+
+    def to_dict(self, missing=MISSING):
+        """Dict in the scrapers' CSV shape, with missing values as `missing`"""
+        return {field: missing if getattr(self, field) is None else getattr(self, field) for field in LEAD_FIELDS}
+
+    def __repr__(self):
+        return f"Lead(name={self.name!r}, website={self.website!r}, email={self.email!r})"
+
+
+class LeadTable:
+    """
+    Array-backed column store of leads
+
+    Rating and review counts live in typed arrays (NaN / -1 when missing);
+    text columns are lists of interned strings, so repeated categories and
+    cities are stored once.
+    """
+
+    def __init__(self, rows=None):
+        self.text = {field: [] for field in TEXT_FIELDS}
+        self.rating = array('d')
+        self.reviews = array('q')
+        if rows is not None:
+            self.extend(rows)
+
+    def __len__(self):
+        return len(self.rating)
+
+    def append(self, row):
+        """Add a Lead or a business dict"""
+        lead = row if isinstance(row, Lead) else Lead.from_dict(row)
+        for field in TEXT_FIELDS:
+            value = getattr(lead, field)
+            self.text[field].append(None if value is None else sys.intern(value))
+        self.rating.append(math.nan if lead.rating is None else lead.rating)
+        self.reviews.append(-1 if lead.reviews is None else lead.reviews)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __getitem__(self, idx):
+        rating = self.rating[idx]
+        reviews = self.reviews[idx]
+        return Lead(rating=None if math.isnan(rating) else rating, reviews=None if reviews < 0 else reviews,
+                    **{field: self.text[field][idx] for field in TEXT_FIELDS})
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def to_dicts(self, missing=MISSING):
+        return [lead.to_dict(missing) for lead in self]
+
+    def to_arrow(self):
+        """Convert to a pyarrow Table with a typed schema"""
+        _require_pyarrow('an Arrow table')
+        columns = {field: pa.array(self.text[field], type=pa.string()) for field in TEXT_FIELDS}
+        columns['rating'] = pa.array(self.rating, type=pa.float64(), from_pandas=True)  # NaN -> null
+        columns['reviews'] = pa.array([None if value < 0 else value for value in self.reviews], type=pa.int64())
+        return pa.table({field: columns[field] for field in LEAD_FIELDS})
+
+
+class RecordWriter:
+    def __init__(self, path, fields):
+        """
+        Stream rows to CSV, Parquet or Arrow IPC depending on the file extension
+
+        Args:
+            path: Output file (.parquet / .arrow for columnar, anything else CSV)
+            fields: Column names, in order
+        """
+        self.path = path
+        self.fields = list(fields)
+        self.rows = 0
+        self._batch = []
+        self._columnar = is_columnar(path)
+
+        if self._columnar:
+            _require_pyarrow(path)
+            self._file = None
+            self._writer = None
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fields, extrasaction='ignore')
+            self._writer.writeheader()
+
+    def write(self, row):
+        self.rows += 1
+        if not self._columnar:
+            self._writer.writerow(row)
+            return
+        self._batch.append(row)
+        if len(self._batch) >= BATCH_ROWS:
+            self._flush_batch()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """Flush CSV output; columnar rows are written a full batch at a time"""
+        if not self._columnar:
+            self._file.flush()
+
+    def _flush_batch(self):
+        if not self._batch and self._writer is not None:
+            return
+        table = _rows_to_arrow(self._batch, self.fields)
+        if self._writer is None:
+            if self.path.lower().endswith('.parquet'):
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                self._file = pa.OSFile(self.path, 'wb')
+                self._writer = pa_ipc.new_file(self._file, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+        self._batch = []
+
+    def close(self):
+        if self._columnar:
+            self._flush_batch()  # An empty file still gets the schema
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _rows_to_arrow(rows, fields):
+    """Typed Arrow table for lead columns; other columns keep inferred types"""
+    if set(fields) <= set(LEAD_FIELDS):
+        table = LeadTable(rows).to_arrow()
+        return table.select(fields)
+    columns = {}
+    for field in fields:
+        values = [row.get(field) for row in rows]
+        values = [None if isinstance(value, str) and value in ('', MISSING) else value for value in values]
+        try:
+            column = pa.array(values)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            column = pa.array([None if value is None else str(value) for value in values], type=pa.string())
+        columns[field] = column.cast(pa.string()) if pa.types.is_null(column.type) else column
+    return pa.table(columns)
+
+
+def write_records(rows, path, fields):
+    """Write rows (dicts) to a CSV, Parquet or Arrow IPC file; returns the row count"""
+    writer = RecordWriter(path, fields)
+    try:
+        writer.writerows(rows)
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def read_arrow(path):
+    """Read a Parquet or Arrow IPC file into a pyarrow Table"""
+    _require_pyarrow(path)
+    if path.lower().endswith('.parquet'):
+        return pq.read_table(path)
+    with pa.memory_map(path, 'r') as source:
+        return pa_ipc.open_file(source).read_all()
+
+
+def read_records(path, missing=MISSING):
+    """
+    Read rows as dicts from a CSV, Parquet or Arrow IPC file
+
+    Columnar nulls come back as `missing`, matching what the CSV files hold.
+    """
+    if not is_columnar(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return [{k.strip(): v for k, v in row.items() if k} for row in csv.DictReader(f)]
+    return [{key: missing if value is None else value for key, value in row.items()}
+            for row in read_arrow(path).to_pylist()]
+
+
+def read_dataframe(path, **csv_options):
+    """Load any supported file into a pandas DataFrame"""
+    import pandas as pd
+    if not is_columnar(path):
+        return pd.read_csv(path, **csv_options)
+    return read_arrow(path).to_pandas()
+
+
+def write_dataframe(df, path):
+    """Save a DataFrame as CSV, or as Parquet / Arrow IPC with 'N/A' stored as null"""
+    if not is_columnar(path):
+        df.to_csv(path, index=False)
+        return
+    _require_pyarrow(path)
+    df = df.mask(df == MISSING)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if path.lower().endswith('.parquet'):
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, 'wb') as sink, pa_ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Canonical site origins
+Business websites are usually listed as bare domains that redirect
+(http -> https, example.com -> www.example.com). The cache records where each
+site's redirects end up the first time it is fetched, so every later page
+URL for that site is built on the final origin and skips the redirect
+round trips. Redirects to another site (a parked-domain seller, a social
+profile) are not the business's origin and are never recorded.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from urllib.parse import urlparse, urlunparse
+
+from scrape_history import canonical_domain
+
+
+class OriginCache:
+    def __init__(self, path=None, ttl=30 * 24 * 3600):
+        """
+        Create an origin cache
+
+        Args:
+            path: SQLite file to persist origins in (None keeps them in memory for this run)
+            ttl: Seconds a recorded origin is trusted before being resolved again
+        """
+        self.ttl = ttl
+        self.hits = 0
+
+        if path:
+            cache_dir = os.path.dirname(path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path or ':memory:', check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS origins (domain TEXT PRIMARY KEY, origin TEXT, resolved_at REAL)")
+        self.db.commit()
+
+    def origin(self, url):
+        """Recorded final origin (scheme://host) for a URL's site, or None"""
+        domain = canonical_domain(url)
+        if not domain:
+            return None
+        with self.lock:
+            row = self.db.execute("SELECT origin, resolved_at FROM origins WHERE domain = ?", (domain,)).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] >= self.ttl):
+            return None
+        return row[0]
+
+    def canonical_url(self, url):
+        """
+        Rewrite a URL onto its site's recorded origin, keeping path and query
+
+        Bare domains without a recorded origin get https:// prepended.
+        """
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+
+        origin = self.origin(url)
+        if origin is None:
+            return url
+        self.hits += 1
+        scheme, netloc = origin.split('://', 1)
+        return urlunparse(urlparse(url)._replace(scheme=scheme, netloc=netloc))
+
+    def record(self, url, final_url):
+        """Remember the origin a fetch of url ended up on, if the redirects stayed on the same site"""
+        final = urlparse(final_url or '')
+        domain = canonical_domain(url)
+        if final.scheme not in ('http', 'https') or not final.netloc or not domain:
+            return
+        if canonical_domain(final_url) != domain:
+            return  # Only scheme and www changes; a redirect elsewhere isn't this site's origin
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO origins (domain, origin, resolved_at) VALUES (?, ?, ?)",
+                            (domain, f"{final.scheme}://{final.netloc.lower()}", time.time()))
+            self.db.commit()
+
+    def forget(self, url):
+        """Drop a site's origin, e.g. after the recorded one stopped answering"""
+        with self.lock:
+            self.db.execute("DELETE FROM origins WHERE domain = ?", (canonical_domain(url),))
+            self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Compressed page archive
+Keeps the HTML fetched during email scraping so extraction can be re-run
+offline (see reextract_emails.py). Two append-only files:
+
+    <archive>.pages   zlib-compressed pages, one independent stream per page
+    <archive>.index   tab-separated: visit id, site key, page URL, offset, length, fetched at,
+                      whether the visit's emails were SMTP-verified (1/0; absent in older archives)
+
+A visit is one scrape of one site; its pages are indexed in the order they
+were fetched. The site key (scrape_history.site_key) is that of the website
+as listed in the input, before any redirect canonicalization, so results
+files match it whether or not their website column was rewritten; pages on
+a shared host (facebook.com/..., sites.google.com/...) are kept apart by path. Appends are serialized through an
+exclusive lock on <archive>.lock, so several processes may share an archive.
+"""
+
+import os
+import time
+import uuid
+import zlib
+import threading
+from collections import namedtuple
+
+try:
+    import fcntl
+except ImportError:  # Windows locks a byte of the lock file instead
+    fcntl = None
+    import msvcrt
+
+from scrape_history import site_key
+
+PageEntry = namedtuple('PageEntry', ['visit', 'site', 'url', 'offset', 'length', 'fetched_at', 'verified'],
+                       defaults=[None])
+
+COMPRESS_LEVEL = 6
+
+
+def new_visit_id():
+    """Identifier grouping the pages of one site visit"""
+    return uuid.uuid4().hex[:16]
+
+
+def _lock_file(f):
+    """Block until this process holds the exclusive lock on an open file"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue  # LK_LOCK gives up after about ten seconds; keep waiting
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PageArchive:
+    def __init__(self, path):
+        """
+        Open an archive for appending (created if missing)
+
+        Args:
+            path: Archive path without extension
+        """
+        self.path = path
+        self.pages_written = 0
+        self.bytes_written = 0
+
+        archive_dir = os.path.dirname(path)
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+        self.lock = threading.Lock()  # Threads of this process; _lock_file covers other processes
+        self._lock_file = open(path + '.lock', 'a+b')
+        self._pages = open(path + '.pages', 'ab')
+        self._index = open(path + '.index', 'a', encoding='utf-8')
+
+    def add(self, visit, site_url, page_url, html, verified=None):
+        """
+        Append one fetched page of a site visit
+
+        Args:
+            visit: Visit id from new_visit_id(), shared by the visit's pages
+            site_url: Website as listed in the input (the key reextract_emails.py matches on)
+            page_url: URL the page was actually fetched from
+            html: Page source
+            verified: Whether the visit's emails go through SMTP verification (None if unknown)
+        """
+        if not html:
+            return
+        blob = zlib.compress(html.encode('utf-8', errors='replace'), COMPRESS_LEVEL)
+        site = site_key(site_url)
+        # Tabs and newlines can't appear in URLs we fetch, but keep the index parseable regardless
+        page_url = page_url.replace('\t', '%09').replace('\n', '%0A')
+        flag = '' if verified is None else ('\t1' if verified else '\t0')
+        with self.lock:
+            _lock_file(self._lock_file)
+            try:
+                offset = self._pages.seek(0, os.SEEK_END)
+                self._pages.write(blob)
+                self._pages.flush()
+                # The index line is written last, so a crash never indexes a partial page
+                self._index.write(f"{visit}\t{site}\t{page_url}\t{offset}\t{len(blob)}\t{time.time():.0f}{flag}\n")
+                self._index.flush()
+            finally:
+                _unlock_file(self._lock_file)
+            self.pages_written += 1
+            self.bytes_written += len(blob)
+
+    def close(self):
+        self._pages.close()
+        self._index.close()
+        self._lock_file.close()
+
+
+def read_index(path):
+    """Yield every PageEntry in archive order, skipping a torn last line"""
+    with open(path + '.index', 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                continue
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) not in (6, 7) or (len(fields) == 7 and fields[6] not in ('0', '1')):
+                continue
+            try:
+                yield PageEntry(fields[0], fields[1], fields[2], int(fields[3]), int(fields[4]), float(fields[5]),
+                                fields[6] == '1' if len(fields) == 7 else None)
+            except ValueError:
+                continue
+
+
+def latest_visits(path):
+    """
+    Pages of the most recent visit to each site
+
+    Returns:
+        Dict of site key -> list of PageEntry in fetch order
+    """
+    visits = {}
+    latest = {}
+    for entry in read_index(path):
+        visits.setdefault(entry.visit, []).append(entry)
+        latest[entry.site] = entry.visit  # Later lines are later visits
+    return {site: visits[visit] for site, visit in latest.items()}
+
+
+def read_page(pages_file, entry):
+    """Decompress one page from an open <archive>.pages file (or mmap)"""
+    pages_file.seek(entry.offset)
+    return zlib.decompress(pages_file.read(entry.length)).decode('utf-8', errors='replace')
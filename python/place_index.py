@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Seen-place index for Google Maps scraping
+Overlapping ZIP searches return the same businesses many times. The index
+remembers every place already scraped, keyed by the Maps place identifier
+from the card link (name + address as a fallback), so repeats can be skipped
+before their detail panel is opened.
+"""
+
+import os
+import re
+import threading
+
+# Place identifiers embedded in /maps/place/... links, most specific first
+PLACE_ID_PATTERNS = (
+    re.compile(r'!19s([^!?&/]+)'),                      # Google place ID (ChIJ...)
+    re.compile(r'!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)'),  # Feature ID
+)
+
+
+def _normalize(value):
+    """Lowercase and collapse whitespace/punctuation for fallback keys"""
+    value = (value or '').strip().lower()
+    if value == 'n/a':
+        return ''
+    return re.sub(r'[^a-z0-9]+', ' ', value).strip()
+
+
+def place_key(business):
+    """
+    Build the dedupe key for a business
+
+    Args:
+        business: Business dict with place_url, name and address
+
+    Returns:
+        Key string, or None if the business cannot be identified
+    """
+    url = business.get('place_url') or ''
+    for pattern in PLACE_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return f"place:{match.group(1)}"
+
+    name = _normalize(business.get('name'))
+    if not name:
+        return None
+    return f"name:{name}|{_normalize(business.get('address'))}"
+
+
+class PlaceIndex:
+    def __init__(self, path=None):
+        """
+        Create a seen-place index
+
+        Args:
+            path: Optional file to load known places from and append saved ones
+                to (see persist), so the index persists across runs
+        """
+        self.path = path
+        self.keys = set()
+        self.duplicates = 0
+        self.lock = threading.Lock()
+        self._file = None
+
+        if path:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.keys.update(line.strip() for line in f if line.strip())
+            self._file = open(path, 'a', encoding='utf-8')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def contains(self, business):
+        """Check whether a business is already known (duplicates are counted by add)"""
+        key = place_key(business)
+        if key is None:
+            return False
+        with self.lock:
+            return key in self.keys
+
+    def add(self, business):
+        """
+        Claim a business as seen for this run (see persist for the file)
+
+        Returns:
+            True if it was new, False if it was already in the index
+        """
+        key = place_key(business)
+        if key is None:
+            return True
+        with self.lock:
+            if key in self.keys:
+                self.duplicates += 1
+                return False
+            self.keys.add(key)
+        return True
+
+    def persist(self, businesses):
+        """
+        Append claimed businesses to the index file
+
+        Call only once their rows are safely written: a place on file is
+        skipped by every later run, so it must never be on file without its row.
+        """
+        keys = [key for key in map(place_key, businesses) if key is not None]
+        with self.lock:
+            if self._file and keys:
+                self._file.write(''.join(key + '\n' for key in keys))
+                self._file.flush()
+
+    def discard(self, businesses):
+        """Release claims whose rows could not be written, so later searches may keep them"""
+        with self.lock:
+            for key in map(place_key, businesses):
+                self.keys.discard(key)
+
+    def close(self):
+        """Close the persistence file"""
+        if self._file:
+            self._file.close()
+            self._file = None
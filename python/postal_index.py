@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline Postal Code Index
+Builds a compact, memory-mapped grid index from a Geonames postal code dump
+(https://download.geonames.org/export/zip/, e.g. US.zip or allCountries.zip)
+so radius and place-name lookups run locally in microseconds, with no API
+quota, radius cap or network access.
+
+Index file layout (native little-endian byte order):
+    header        magic, version, record count, cell count, cell size, string bytes
+    cell_keys     int64[cells]     sorted grid cell keys
+    cell_starts   uint32[cells+1]  first record of each cell (records are sorted by cell)
+    latitudes     float32[records]
+    longitudes    float32[records]
+    str_offsets   uint32[records+1] offsets into the string table
+    name_order    uint32[records]  record ids sorted by normalized place name
+    strings       UTF-8 "country\\tpostal\\tplace\\tadmin1 name\\tadmin1 code\\tnormalized place" per record
+"""
+
+import sys
+import io
+
+# Fix Unicode encoding issues on Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import re
+import math
+import mmap
+import array
+import struct
+import bisect
+import argparse
+
+MAGIC = b'LFPI'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIdQ')
+DEFAULT_CELL_SIZE = 0.1  # Degrees; ~11 km of latitude
+LNG_CELL_STRIDE = 100000
+EARTH_RADIUS_KM = 6371.0088
+
+
+def normalize_place(name):
+    """Lowercase a place name and collapse punctuation/whitespace for lookups"""
+    return re.sub(r'[^\w]+', ' ', (name or '').lower()).strip()
+
+
+def _cell_key(lat, lng, cell_size):
+    lat_cell = int(math.floor((lat + 90.0) / cell_size))
+    lng_cell = int(math.floor((lng + 180.0) / cell_size))
+    return lat_cell * LNG_CELL_STRIDE + lng_cell
+
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _pad(f):
+    """Pad the file to an 8-byte boundary so every section can be cast in place"""
+    remainder = f.tell() % 8
+    if remainder:
+        f.write(b'\0' * (8 - remainder))
+
+
+def build_postal_index(dump_path, index_path, countries=None, cell_size=DEFAULT_CELL_SIZE):
+    """
+    Build an index file from a Geonames postal code dump
+
+    Args:
+        dump_path: Path to the tab-separated dump (US.txt, allCountries.txt, ...)
+        index_path: Path of the index file to write
+        countries: Optional list of country codes to keep
+        cell_size: Grid cell size in degrees
+
+    Returns:
+        Number of records indexed
+    """
+    keep = {c.upper() for c in countries} if countries else None
+    records = []
+
+    with open(dump_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 11:
+                continue
+            country, postal, place, admin_name1, admin_code1 = fields[0], fields[1], fields[2], fields[3], fields[4]
+            if keep and country.upper() not in keep:
+                continue
+            try:
+                lat, lng = float(fields[9]), float(fields[10])
+            except ValueError:
+                continue
+            if not postal:
+                continue
+            text = '\t'.join((country, postal, place, admin_name1, admin_code1, normalize_place(place)))
+            records.append((_cell_key(lat, lng, cell_size), lat, lng, text))
+
+    records.sort(key=lambda record: record[0])
+
+    cell_keys = array.array('q')
+    cell_starts = array.array('I')
+    latitudes = array.array('f')
+    longitudes = array.array('f')
+    str_offsets = array.array('I', [0])
+    strings = bytearray()
+
+    for idx, (key, lat, lng, text) in enumerate(records):
+        if not cell_keys or cell_keys[-1] != key:
+            cell_keys.append(key)
+            cell_starts.append(idx)
+        latitudes.append(lat)
+        longitudes.append(lng)
+        strings += text.encode('utf-8')
+        str_offsets.append(len(strings))
+    cell_starts.append(len(records))
+
+    name_order = array.array('I', sorted(range(len(records)), key=lambda i: records[i][3].rsplit('\t', 1)[1]))
+
+    with open(index_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(records), len(cell_keys), cell_size, len(strings)))
+        for section in (cell_keys, cell_starts, latitudes, longitudes, str_offsets, name_order):
+            if sys.byteorder != 'little':
+                section.byteswap()
+            f.write(section.tobytes())
+            _pad(f)
+        f.write(bytes(strings))
+
+    return len(records)
+
+
+class PostalIndex:
+    def __init__(self, index_path):
+        """
+        Open an index built by build_postal_index (memory-mapped, nothing is copied)
+
+        Args:
+            index_path: Path to the index file
+        """
+        if sys.byteorder != 'little':
+            raise RuntimeError("Postal index files can only be read on little-endian machines")
+
+        self._file = open(index_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        magic, version, count, cells, cell_size, strings_len = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a postal index file: {index_path}")
+        self.count = count
+        self.cell_size = cell_size
+        self.lng_cells = int(math.ceil(360.0 / cell_size))
+
+        offset = HEADER.size
+
+        def section(typecode, length):
+            nonlocal offset
+            size = length * struct.calcsize(typecode)
+            data = view[offset:offset + size].cast(typecode)
+            offset += size
+            offset += (8 - offset % 8) % 8
+            return data
+
+        self.cell_keys = section('q', cells)
+        self.cell_starts = section('I', cells + 1)
+        self.latitudes = section('f', count)
+        self.longitudes = section('f', count)
+        self.str_offsets = section('I', count + 1)
+        self.name_order = section('I', count)
+        self.strings = view[offset:offset + strings_len]
+
+    def __len__(self):
+        return self.count
+
+    def _fields(self, idx):
+        return bytes(self.strings[self.str_offsets[idx]:self.str_offsets[idx + 1]]).decode('utf-8').split('\t')
+
+    def record(self, idx, distance_km=None):
+        """Return one record as a dictionary"""
+        country, postal, place, admin_name1, admin_code1, _ = self._fields(idx)
+        result = {
+            "postal_code": postal,
+            "place_name": place,
+            "admin_name1": admin_name1,
+            "admin_code1": admin_code1,
+            "country": country,
+            "latitude": self.latitudes[idx],
+            "longitude": self.longitudes[idx],
+        }
+        if distance_km is not None:
+            result["distance_km"] = round(distance_km, 2)
+        return result
+
+    def nearby(self, latitude, longitude, radius_km=30, max_rows=None, country=None):
+        """
+        Find postal codes within a radius of a point, nearest first
+
+        Args:
+            latitude: Latitude of the centre
+            longitude: Longitude of the centre
+            radius_km: Search radius in kilometres (no upper limit)
+            max_rows: Optional maximum number of results
+            country: Optional country code filter
+
+        Returns:
+            List of record dictionaries including distance_km
+        """
+        dlat = radius_km / 111.0
+        dlng = radius_km / (111.32 * max(math.cos(math.radians(latitude)), 0.01))
+        lat_lo = int(math.floor((max(latitude - dlat, -90.0) + 90.0) / self.cell_size))
+        lat_hi = int(math.floor((min(latitude + dlat, 90.0) + 90.0) / self.cell_size))
+        lng_lo = int(math.floor((longitude - dlng + 180.0) / self.cell_size))
+        lng_hi = int(math.floor((longitude + dlng + 180.0) / self.cell_size))
+        if lng_hi - lng_lo >= self.lng_cells:
+            lng_lo, lng_hi = 0, self.lng_cells - 1
+
+        hits = []
+        seen_cells = set()
+        for lat_cell in range(lat_lo, lat_hi + 1):
+            for lng_cell in range(lng_lo, lng_hi + 1):
+                key = lat_cell * LNG_CELL_STRIDE + (lng_cell % self.lng_cells)  # Wrap at the antimeridian
+                if key in seen_cells:
+                    continue
+                seen_cells.add(key)
+
+                pos = bisect.bisect_left(self.cell_keys, key)
+                if pos >= len(self.cell_keys) or self.cell_keys[pos] != key:
+                    continue
+                for idx in range(self.cell_starts[pos], self.cell_starts[pos + 1]):
+                    distance = _haversine_km(latitude, longitude, self.latitudes[idx], self.longitudes[idx])
+                    if distance <= radius_km:
+                        hits.append((distance, idx))
+
+        hits.sort()
+        results = []
+        for distance, idx in hits:
+            record = self.record(idx, distance)
+            if country and record["country"].upper() != country.upper():
+                continue
+            results.append(record)
+            if max_rows and len(results) >= max_rows:
+                break
+        return results
+
+    def by_place(self, place_name, admin=None, country=None):
+        """
+        Find postal codes for a place name
+
+        Args:
+            place_name: City or place name (case and punctuation insensitive)
+            admin: Optional state/province code or name filter
+            country: Optional country code filter
+
+        Returns:
+            List of record dictionaries
+        """
+        target = normalize_place(place_name)
+
+        # Binary search over records ordered by normalized place name
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._fields(self.name_order[mid])[5] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        admin_lower = admin.lower() if admin else None
+        results = []
+        for pos in range(lo, self.count):
+            idx = self.name_order[pos]
+            fields = self._fields(idx)
+            if fields[5] != target:
+                break
+            if country and fields[0].upper() != country.upper():
+                continue
+            if admin_lower and admin_lower not in (fields[3].lower(), fields[4].lower()):
+                continue
+            results.append(self.record(idx))
+        return results
+
+    def close(self):
+        """Release the memory map"""
+        for name in ('cell_keys', 'cell_starts', 'latitudes', 'longitudes', 'str_offsets', 'name_order', 'strings'):
+            getattr(self, name).release()
+        self._mmap.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build or query the offline postal code index')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='Build an index from a Geonames postal code dump')
+    build.add_argument('dump_file', help='Geonames dump (e.g. US.txt or allCountries.txt)')
+    build.add_argument('--output', '-o', help='Index file to write', default='postal_codes.idx')
+    build.add_argument('--country', '-c', action='append', help='Only keep these country codes (repeatable)')
+    build.add_argument('--cell-size', type=float, help='Grid cell size in degrees', default=DEFAULT_CELL_SIZE)
+
+    near = subparsers.add_parser('nearby', help='Postal codes within a radius of a point')
+    near.add_argument('index_file')
+    near.add_argument('latitude', type=float)
+    near.add_argument('longitude', type=float)
+    near.add_argument('--radius', type=float, default=30)
+    near.add_argument('--max-rows', type=int, default=None)
+
+    place = subparsers.add_parser('place', help='Postal codes for a place name')
+    place.add_argument('index_file')
+    place.add_argument('name')
+    place.add_argument('--admin', help='State/province code or name')
+    place.add_argument('--country')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        count = build_postal_index(args.dump_file, args.output, countries=args.country, cell_size=args.cell_size)
+        print(f"✅ Indexed {count} postal codes into {args.output}")
+    else:
+        index = PostalIndex(args.index_file)
+        if args.command == 'nearby':
+            rows = index.nearby(args.latitude, args.longitude, radius_km=args.radius, max_rows=args.max_rows)
+        else:
+            rows = index.by_place(args.name, admin=args.admin, country=args.country)
+        for row in rows:
+            print(f"{row['postal_code']}\t{row['place_name']}\t{row['admin_code1']}\t{row.get('distance_km', '')}")
+        index.close()
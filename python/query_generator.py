@@ -1,13 +1,61 @@
-import csv
 import json
 import sys
-import requests
 import os
 from urllib.parse import quote
+from postal_index import PostalIndex
+from geonames_client import GeonamesClient, GeonamesError
+import job_scheduler
+from query_optimizer import optimize_zip_coverage
+from lead_records import RecordWriter, write_records
+from geo_tiles import TileHistory, grid_tiles, plan_tiles, tile_url, tile_zoom
 
 # Geonames API configuration - read from environment or fall back to demo
 GEONAMES_USERNAME = os.getenv("GEONAMES_USERNAME", "demo")
 
+# On-disk cache of Geonames responses (set GEONAMES_CACHE_PATH to "" to disable)
+GEONAMES_CACHE_PATH = os.getenv(
+    "GEONAMES_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "geonames_cache.sqlite")
+)
+GEONAMES_CACHE_TTL = int(os.getenv("GEONAMES_CACHE_TTL", str(30 * 24 * 3600)))
+_geonames_client = None
+
+# Offline postal code index built with `python postal_index.py build US.txt -o ...`
+POSTAL_INDEX_PATH = os.getenv(
+    "POSTAL_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "postal_codes.idx")
+)
+_postal_index = None
+
+
+def get_postal_index():
+    """
+    Open the offline postal code index once per process
+    
+    Returns:
+        PostalIndex, or None if no index file is available
+    """
+    global _postal_index
+    if _postal_index is None and os.path.exists(POSTAL_INDEX_PATH):
+        try:
+            _postal_index = PostalIndex(POSTAL_INDEX_PATH)
+        except Exception as e:
+            print(f"Warning: Could not open postal index {POSTAL_INDEX_PATH}: {e}", file=sys.stderr)
+    return _postal_index
+
+
+def get_geonames_client():
+    """Shared Geonames client with connection pooling and a persistent response cache"""
+    global _geonames_client
+    if _geonames_client is None:
+        _geonames_client = GeonamesClient(
+            GEONAMES_USERNAME,
+            cache_path=GEONAMES_CACHE_PATH or None,
+            ttl=GEONAMES_CACHE_TTL
+        )
+    return _geonames_client
+
+
 def get_zip_codes_from_api(city_geoname_id):
     """
     Fetch ZIP codes for a city from Geonames API using geoname ID
@@ -19,21 +67,17 @@ def get_zip_codes_from_api(city_geoname_id):
         List of tuples (zip_code, city_name)
     """
     try:
-        url = f"http://api.geonames.org/postalCodeSearchJSON?placename={city_geoname_id}&maxRows=1000&username={GEONAMES_USERNAME}"
-        response = requests.get(url, timeout=10)
+        data = get_geonames_client().get("postalCodeSearchJSON", {"placename": city_geoname_id, "maxRows": 1000})
         
-        if response.status_code == 200:
-            data = response.json()
+        if "postalCodes" in data and len(data["postalCodes"]) > 0:
+            zip_codes = []
+            for postal in data["postalCodes"]:
+                zip_code = postal.get("postalCode", "")
+                place_name = postal.get("placeName", city_geoname_id)
+                if zip_code:
+                    zip_codes.append((zip_code, place_name))
             
-            if "postalCodes" in data and len(data["postalCodes"]) > 0:
-                zip_codes = []
-                for postal in data["postalCodes"]:
-                    zip_code = postal.get("postalCode", "")
-                    place_name = postal.get("placeName", city_geoname_id)
-                    if zip_code:
-                        zip_codes.append((zip_code, place_name))
-                
-                return zip_codes if zip_codes else [(city_geoname_id, city_geoname_id)]
+            return zip_codes if zip_codes else [(city_geoname_id, city_geoname_id)]
         
         # Fallback if API fails
         return [(city_geoname_id, city_geoname_id)]
@@ -43,18 +87,36 @@ def get_zip_codes_from_api(city_geoname_id):
         return [(city_geoname_id, city_geoname_id)]
 
 
-def get_zip_codes(city, state):
+def get_zip_codes(city, state, country=None):
     """
     Fetch ZIP codes for a given city and state
-    Tries API first, falls back to hardcoded list for common cities
+    
+    Returns:
+        List of tuples (zip_code, city_name)
+    """
+    return [(record["zip_code"], record["city"]) for record in get_zip_records(city, state, country)]
+
+
+def get_zip_records(city, state, country=None):
+    """
+    Fetch ZIP codes for a given city and state, with centroids when known
+    Tries the offline postal index first, falls back to hardcoded list for common cities
     
     Args:
         city: City name
         state: State code
+        country: Optional country code
     
     Returns:
-        List of tuples (zip_code, city_name)
+        List of dicts with zip_code, city, latitude, longitude (None for the hardcoded fallback)
     """
+    index = get_postal_index()
+    if index is not None:
+        records = index.by_place(city, admin=state, country=country)
+        if records:
+            return [_zip_record(record["postal_code"], record["place_name"], record["latitude"], record["longitude"])
+                    for record in records]
+    
     # Fallback hardcoded ZIP codes for demo/testing
     city_zips = {
         "boise": [
@@ -82,67 +144,147 @@ def get_zip_codes(city, state):
     # Try hardcoded list first (for demo mode)
     city_key = city.lower()
     if city_key in city_zips:
-        return city_zips[city_key]
+        return [_zip_record(zip_code, city_name) for zip_code, city_name in city_zips[city_key]]
     
     # If not in hardcoded list, return single entry
     # In production with API key, you'd call get_zip_codes_from_api here
-    return [(f"{city}, {state}", city)]
+    return [_zip_record(f"{city}, {state}", city)]
+
+
+def _zip_record(zip_code, city_name, latitude=None, longitude=None):
+    return {"zip_code": zip_code, "city": city_name, "latitude": latitude, "longitude": longitude}
 
 
-def get_zip_codes_by_coordinates(latitude, longitude, city_name="Unknown"):
+def get_zip_codes_by_coordinates(latitude, longitude, city_name="Unknown", radius_km=30, max_rows=500, country=None):
     """
     Fetch ZIP codes using latitude and longitude coordinates
     
+    Returns:
+        List of tuples (zip_code, city_name)
+    """
+    records = get_zip_records_by_coordinates(latitude, longitude, city_name, radius_km, max_rows, country)
+    return [(record["zip_code"], record["city"]) for record in records]
+
+
+def get_zip_records_by_coordinates(latitude, longitude, city_name="Unknown", radius_km=30, max_rows=500, country=None):
+    """
+    Fetch ZIP codes with their centroids using latitude and longitude coordinates
+    Uses the offline postal index when available, otherwise the Geonames API
+    
     Args:
         latitude: Latitude of the city
         longitude: Longitude of the city
         city_name: Name of the city (for fallback)
+        radius_km: Search radius (the API caps this at 30km)
+        max_rows: Maximum ZIP codes to return (the API caps this at 500)
+        country: Optional country code filter (offline index only)
     
     Returns:
-        List of tuples (zip_code, city_name)
+        List of dicts with zip_code, city, latitude, longitude
     """
+    index = get_postal_index()
+    if index is not None:
+        records = index.nearby(float(latitude), float(longitude), radius_km=radius_km, max_rows=max_rows, country=country)
+        if records:
+            print(f"DEBUG: Found {len(records)} ZIP codes in offline postal index", file=sys.stderr)
+            return [_zip_record(r["postal_code"], r["place_name"], r["latitude"], r["longitude"]) for r in records]
+        print("WARNING: No postal codes in offline index, trying Geonames API", file=sys.stderr)
+    
     try:
         # Use findNearbyPostalCodes API endpoint with lat/lng
         # Free account limits: max radius = 30km, max rows = 500
-        url = f"http://api.geonames.org/findNearbyPostalCodesJSON?lat={latitude}&lng={longitude}&radius=30&maxRows=500&username={GEONAMES_USERNAME}"
+        api_radius = min(radius_km, 30)
+        api_rows = min(max_rows, 500) if max_rows else 500
+        params = {"lat": latitude, "lng": longitude, "radius": api_radius, "maxRows": api_rows}
         
         print(f"DEBUG: Fetching ZIP codes from Geonames for coordinates: {latitude}, {longitude}", file=sys.stderr)
-        print(f"DEBUG: URL: {url}", file=sys.stderr)
         
-        response = requests.get(url, timeout=10)
+        client = get_geonames_client()
+        hits_before = client.hits
+        data = client.get("findNearbyPostalCodesJSON", params)
+        if client.hits > hits_before:
+            print("DEBUG: Served from Geonames response cache", file=sys.stderr)
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Check for API errors
-            if "status" in data:
-                print(f"ERROR: Geonames API error: {data['status'].get('message', 'Unknown error')}", file=sys.stderr)
-                return [("00000", city_name)]
+        if "postalCodes" in data and len(data["postalCodes"]) > 0:
+            zip_codes = []
+            for postal in data["postalCodes"]:
+                zip_code = postal.get("postalCode", "")
+                place_name = postal.get("placeName", city_name)
+                if zip_code:
+                    zip_codes.append(_zip_record(zip_code, place_name, postal.get("lat"), postal.get("lng")))
             
-            if "postalCodes" in data and len(data["postalCodes"]) > 0:
-                zip_codes = []
-                for postal in data["postalCodes"]:
-                    zip_code = postal.get("postalCode", "")
-                    place_name = postal.get("placeName", city_name)
-                    if zip_code:
-                        zip_codes.append((zip_code, place_name))
-                
-                print(f"DEBUG: Successfully found {len(zip_codes)} ZIP codes", file=sys.stderr)
-                return zip_codes if zip_codes else [("00000", city_name)]
-            else:
-                print(f"WARNING: No postal codes in response. Data: {data}", file=sys.stderr)
+            print(f"DEBUG: Successfully found {len(zip_codes)} ZIP codes", file=sys.stderr)
+            return zip_codes if zip_codes else [_zip_record("00000", city_name)]
         else:
-            print(f"ERROR: HTTP {response.status_code}: {response.text}", file=sys.stderr)
+            print(f"WARNING: No postal codes in response. Data: {data}", file=sys.stderr)
         
-        return [("00000", city_name)]
+        return [_zip_record("00000", city_name)]
     
+    except GeonamesError as e:
+        # Check for API errors
+        print(f"ERROR: Geonames API error: {e}", file=sys.stderr)
+        return [_zip_record("00000", city_name)]
     except Exception as e:
         print(f"ERROR: Exception fetching ZIP codes: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc(file=sys.stderr)
-        return [("00000", city_name)]
+        return [_zip_record("00000", city_name)]
+
+QUERY_FIELDS = ["query", "google_maps_url", "business_type", "zip_code", "city", "state", "country"]
+
+def resolve_zip_list(city, state="ID", country="US", custom_zips=None, latitude=None, longitude=None,
+                     radius_km=30, max_rows=500, optimize=False, footprint_km=4.0, target_coverage=1.0):
+    """
+    Determine which ZIP codes to search for a location
+    
+    Args:
+        optimize: Drop ZIPs whose area is already covered by a neighbouring
+            search (only ZIPs from coordinates or the offline index carry centroids)
+        footprint_km: Estimated radius one Maps search covers
+        target_coverage: Fraction of ZIP centroids the selection must cover
+    
+    Returns:
+        Tuple of (list of (zip_code, city_name), coverage report or None)
+    """
+    if custom_zips:
+        # Use custom ZIPs if provided
+        records = [_zip_record(zip_code, city) for zip_code in custom_zips]
+    elif latitude is not None and longitude is not None:
+        # Fetch ZIP codes from Geonames API using coordinates
+        records = get_zip_records_by_coordinates(latitude, longitude, city, radius_km, max_rows, country)
+    else:
+        # Fall back to offline index, predefined list or simple city/state query
+        records = get_zip_records(city, state, country)
+    
+    report = None
+    if optimize:
+        records, report = optimize_zip_coverage(records, footprint_km, target_coverage)
+        print(f"DEBUG: Coverage optimizer kept {report['selectedQueries']}/{report['originalQueries']} ZIP codes "
+              f"(~{report['estimatedCoverage'] * 100:.0f}% coverage, {report['reductionFactor']}x fewer searches)",
+              file=sys.stderr)
+    
+    return [(record["zip_code"], record["city"]) for record in records], report
+
+def build_query(business_type, zip_code, city_name, state, country):
+    """Build one query dictionary with its Google Maps search URL"""
+    query = f"{business_type}, {zip_code}, {city_name}, {state}, {country}"
+    
+    # Generate Google Maps search URL
+    encoded_query = quote(query)
+    url = f"https://www.google.com/maps/search/{encoded_query}/?hl=en&gl=US"
+    
+    return {
+        "query": query,
+        "google_maps_url": url,
+        "business_type": business_type,
+        "zip_code": zip_code,
+        "city": city_name,
+        "state": state,
+        "country": country
+    }
 
-def generate_queries(business_type, city, state="ID", country="US", custom_zips=None, latitude=None, longitude=None):
+def generate_queries(business_type, city, state="ID", country="US", custom_zips=None, latitude=None, longitude=None,
+                     radius_km=30, max_rows=500, optimize=False, footprint_km=4.0, target_coverage=1.0):
     """
     Generate Google Maps search queries for a business type across ZIP codes
     
@@ -154,54 +296,228 @@ def generate_queries(business_type, city, state="ID", country="US", custom_zips=
         custom_zips: Optional list of custom ZIP codes
         latitude: Optional latitude for ZIP code lookup
         longitude: Optional longitude for ZIP code lookup
+        radius_km: Radius around the coordinates to collect ZIP codes from
+        max_rows: Maximum number of ZIP codes to use
+        optimize: Keep only a near-minimal subset of ZIPs covering the area
+        footprint_km: Estimated radius one Maps search covers
+        target_coverage: Fraction of ZIP centroids the selection must cover
     
     Returns:
         List of query dictionaries
     """
-    queries = []
+    zip_list, _ = resolve_zip_list(city, state, country, custom_zips, latitude, longitude, radius_km, max_rows,
+                                   optimize, footprint_km, target_coverage)
+    return [build_query(business_type, zip_code, city_name, state, country) for zip_code, city_name in zip_list]
+
+def generate_batch_queries(business_types, locations, output_file="queries.csv", radius_km=30, max_rows=500, preview_size=5,
+                           optimize=False, footprint_km=4.0, target_coverage=1.0):
+    """
+    Generate queries for every business type in every location and stream them to a file
     
-    # Determine which ZIP codes to use
-    if custom_zips:
-        # Use custom ZIPs if provided
-        zip_list = [(zip_code, city) for zip_code in custom_zips]
-    elif latitude is not None and longitude is not None:
-        # Fetch ZIP codes from Geonames API using coordinates
-        zip_list = get_zip_codes_by_coordinates(latitude, longitude, city)
-    else:
-        # Fall back to predefined list or simple city/state query
-        zip_list = get_zip_codes(city, state)
+    Each location's ZIP codes are resolved once and reused for all business
+    types; rows are written as they are produced instead of building the
+    whole cross product in memory.
     
-    for zip_code, city_name in zip_list:
-        query = f"{business_type}, {zip_code}, {city_name}, {state}, {country}"
-        
-        # Generate Google Maps search URL
-        encoded_query = quote(query)
-        url = f"https://www.google.com/maps/search/{encoded_query}/?hl=en&gl=US"
-        
-        queries.append({
-            "query": query,
-            "google_maps_url": url,
-            "business_type": business_type,
-            "zip_code": zip_code,
-            "city": city_name,
-            "state": state,
-            "country": country
-        })
-    
-    return queries
+    Args:
+        business_types: List of business types
+        locations: List of location dictionaries with city and optional state,
+            country, customZips, latitude, longitude, radiusKm, maxRows
+        output_file: Path to the output file (.parquet / .arrow for columnar, otherwise CSV)
+        radius_km: Default ZIP radius for locations given by coordinates
+        max_rows: Default maximum ZIP codes per location
+        preview_size: Number of queries to return as a preview
+        optimize: Keep only a near-minimal subset of each location's ZIPs
+        footprint_km: Estimated radius one Maps search covers
+        target_coverage: Fraction of ZIP centroids the selection must cover
+    
+    Returns:
+        Tuple of (total query count, per-location summaries, preview queries)
+    """
+    total = 0
+    summaries = []
+    preview = []
+    
+    writer = RecordWriter(output_file, QUERY_FIELDS)
+    try:
+        for location in locations:
+            city = location.get("city", "")
+            state = location.get("state", "ID")
+            country = location.get("country", "US")
+            
+            zip_list, coverage = resolve_zip_list(
+                city,
+                state,
+                country,
+                location.get("customZips"),
+                location.get("latitude"),
+                location.get("longitude"),
+                location.get("radiusKm", radius_km),
+                location.get("maxRows", max_rows),
+                optimize,
+                footprint_km,
+                target_coverage
+            )
+            
+            count = 0
+            for business_type in business_types:
+                for zip_code, city_name in zip_list:
+                    query = build_query(business_type, zip_code, city_name, state, country)
+                    writer.write(query)
+                    if len(preview) < preview_size:
+                        preview.append(query)
+                    count += 1
+            
+            total += count
+            summary = {
+                "city": city,
+                "state": state,
+                "country": country,
+                "zipCodes": len(zip_list),
+                "queries": count
+            }
+            if coverage:
+                summary["coverage"] = coverage
+            summaries.append(summary)
+            print(f"DEBUG: {city}, {state}: {len(zip_list)} ZIP codes, {count} queries", file=sys.stderr)
+    finally:
+        writer.close()
+    
+    return total, summaries, preview
+
+def run_batch(args):
+    """Batch mode: many business types and locations in one invocation"""
+    spec = {}
+    if args.get("specFile"):
+        # Spec file holds businessTypes/locations (and optional defaults)
+        with open(args["specFile"], 'r', encoding='utf-8') as f:
+            spec.update(json.load(f))
+    # Arguments passed explicitly (e.g. outputFile from Node) win over the spec file;
+    # empty placeholders don't wipe out the file's lists
+    spec.update({key: value for key, value in args.items() if value is not None and value != []})
+    
+    business_types = [b for b in spec.get("businessTypes", []) if b]
+    locations = [loc for loc in spec.get("locations", []) if loc.get("city")]
+    output_file = spec.get("outputFile", "queries.csv")
+    
+    if not business_types or not locations:
+        print(json.dumps({
+            "error": "Batch mode needs at least one business type and one location with a city",
+            "success": False
+        }))
+        sys.exit(1)
+    
+    print(f"DEBUG: Batch of {len(business_types)} business types x {len(locations)} locations", file=sys.stderr)
+    
+    total, summaries, preview = generate_batch_queries(
+        business_types,
+        locations,
+        output_file,
+        spec.get("radiusKm", 30),
+        spec.get("maxRows", 500),
+        optimize=spec.get("optimizeCoverage", False),
+        footprint_km=spec.get("footprintKm", 4.0),
+        target_coverage=spec.get("targetCoverage", 1.0)
+    )
+    
+    print(json.dumps({
+        "success": True,
+        "count": total,
+        "file": output_file,
+        "locations": summaries,
+        "queries": preview  # Return first 5 as preview
+    }))
+
+def generate_tile_queries(business_type, latitude, longitude, radius_km=30, tile_km=5, city="", state="ID", country="US",
+                          history=None, saturation=20, sparse_below=0, min_tile_km=0.5):
+    """
+    Generate coordinate-centred Google Maps searches over a grid of tiles
+    
+    Tiles recorded as saturated by earlier scrapes are split up front and
+    sparse sibling tiles merged, so search effort follows business density.
+    
+    Args:
+        business_type: Type of business (e.g., "plumbing", "construction")
+        latitude: Latitude of the area centre
+        longitude: Longitude of the area centre
+        radius_km: Radius of the area to cover
+        tile_km: Edge length of the starting tiles
+        city: City name (informational)
+        state: State abbreviation (informational)
+        country: Country code (informational)
+        history: Optional TileHistory from earlier scrapes of this area
+        saturation: Result count at which a tile is considered capped (the scraper's max results)
+        sparse_below: Merge sibling tiles whose combined results are below this
+        min_tile_km: Never split tiles smaller than this
+    
+    Returns:
+        List of query dictionaries (one per tile)
+    """
+    tiles = grid_tiles(float(latitude), float(longitude), radius_km, tile_km)
+    if history is not None:
+        tiles = plan_tiles(tiles, history.counts, saturation, sparse_below, min_tile_km)
+    
+    return [{
+        "query": f"{business_type} near {tile.latitude:.5f},{tile.longitude:.5f}",
+        "google_maps_url": tile_url(business_type, tile),
+        "business_type": business_type,
+        "tile_key": tile.key,
+        "latitude": round(tile.latitude, 6),
+        "longitude": round(tile.longitude, 6),
+        "size_km": tile.size_km,
+        "zoom": tile_zoom(tile),
+        "city": city,
+        "state": state,
+        "country": country
+    } for tile in tiles]
 
 def save_to_csv(queries, filename="queries.csv"):
-    """Save queries to CSV file"""
+    """Save queries to a CSV, Parquet or Arrow IPC file"""
     if not queries:
         return None
     
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=queries[0].keys())
-        writer.writeheader()
-        writer.writerows(queries)
+    # .parquet / .arrow filenames are written columnar, anything else as CSV
+    write_records(queries, filename, queries[0].keys())
     
     return filename
 
+def run_tiles(args):
+    """Tile mode: coordinate-centred searches over an adaptive grid"""
+    business_type = args.get("businessType", "")
+    latitude = args.get("latitude", None)
+    longitude = args.get("longitude", None)
+    output_file = args.get("outputFile", "queries.csv")
+    
+    if not business_type or latitude is None or longitude is None:
+        print(json.dumps({
+            "error": "Tile mode needs businessType, latitude and longitude",
+            "success": False
+        }))
+        sys.exit(1)
+    
+    history = TileHistory(args["tilePlanFile"]) if args.get("tilePlanFile") else None
+    queries = generate_tile_queries(
+        business_type,
+        latitude,
+        longitude,
+        radius_km=args.get("radiusKm", 30),
+        tile_km=args.get("tileKm", 5),
+        city=args.get("city", ""),
+        state=args.get("state", "ID"),
+        country=args.get("country", "US"),
+        history=history,
+        saturation=args.get("maxResults", 20),
+        sparse_below=args.get("sparseBelow", 0),
+        min_tile_km=args.get("minTileKm", 0.5)
+    )
+    
+    csv_file = save_to_csv(queries, output_file)
+    print(json.dumps({
+        "success": True,
+        "count": len(queries),
+        "file": csv_file,
+        "queries": queries[:5]  # Return first 5 as preview
+    }))
+
 def main():
     """Main execution when called from Node.js"""
     # Parse command line arguments
@@ -213,6 +529,17 @@ def main():
         # Arguments come as JSON string
         args = json.loads(sys.argv[1])
         
+        # Share the Geonames connection and rate budget with other jobs on this machine
+        job_scheduler.register_job('query_generator', priority=args.get("priority", 0))
+        
+        if any(key in args for key in ("businessTypes", "locations", "specFile")):
+            run_batch(args)
+            return
+        
+        if args.get("mode") == "tiles":
+            run_tiles(args)
+            return
+        
         business_type = args.get("businessType", "")
         city = args.get("city", "")
         state = args.get("state", "ID")
@@ -221,6 +548,11 @@ def main():
         latitude = args.get("latitude", None)
         longitude = args.get("longitude", None)
         output_file = args.get("outputFile", "queries.csv")
+        radius_km = args.get("radiusKm", 30)
+        max_rows = args.get("maxRows", 500)
+        optimize = args.get("optimizeCoverage", False)
+        footprint_km = args.get("footprintKm", 4.0)
+        target_coverage = args.get("targetCoverage", 1.0)
         
         print(f"DEBUG: Received arguments:", file=sys.stderr)
         print(f"  - businessType: {business_type}", file=sys.stderr)
@@ -238,15 +570,20 @@ def main():
             sys.exit(1)
         
         # Generate queries
-        queries = generate_queries(
-            business_type, 
-            city, 
-            state, 
-            country, 
-            custom_zips, 
+        zip_list, coverage = resolve_zip_list(
+            city,
+            state,
+            country,
+            custom_zips,
             latitude,
-            longitude
+            longitude,
+            radius_km,
+            max_rows,
+            optimize,
+            footprint_km,
+            target_coverage
         )
+        queries = [build_query(business_type, zip_code, city_name, state, country) for zip_code, city_name in zip_list]
         
         if not queries:
             print(json.dumps({
@@ -265,6 +602,8 @@ def main():
             "file": csv_file,
             "queries": queries[:5]  # Return first 5 as preview
         }
+        if coverage:
+            result["coverage"] = coverage
         
         print(json.dumps(result))
         
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Coverage-optimized query selection
+Neighbouring urban ZIP codes overlap heavily on the map, so searching every
+one mostly returns the same businesses. Given ZIP centroids and an estimated
+search footprint, greedy set cover picks a near-minimal subset of ZIPs whose
+searches still reach every ZIP centroid in the target area.
+"""
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _coverage_sets(points, footprint_km):
+    """
+    For each point, the indexes of points within footprint_km
+
+    All points share one grid whose cells are at least footprint_km across
+    everywhere in the set (longitude columns are sized for the highest
+    latitude present), so every neighbour lies in an adjacent cell.
+    Columns wrap around at the antimeridian.
+    """
+    if not points:
+        return []
+    # 1% slack covers the gap between degrees along a parallel and great-circle distance
+    cell_lat = footprint_km / KM_PER_DEGREE * 1.01
+    max_lat = max(abs(lat) for lat, _ in points)
+    cell_lng = cell_lat / max(math.cos(math.radians(max_lat)), 0.01)
+    columns = max(1, int(360.0 // cell_lng))
+    col_width = 360.0 / columns
+
+    buckets = {}
+    cells = []
+    for idx, (lat, lng) in enumerate(points):
+        cell = (int(math.floor(lat / cell_lat)), int(math.floor((lng + 180.0) / col_width)) % columns)
+        cells.append(cell)
+        buckets.setdefault(cell, []).append(idx)
+
+    covers = []
+    for idx, (lat, lng) in enumerate(points):
+        row, col = cells[idx]
+        covered = set()
+        neighbour_cols = {(col + d_col) % columns for d_col in (-1, 0, 1)}
+        for d_row in (-1, 0, 1):
+            for other_col in neighbour_cols:
+                for other in buckets.get((row + d_row, other_col), ()):
+                    other_lat, other_lng = points[other]
+                    if _haversine_km(lat, lng, other_lat, other_lng) <= footprint_km:
+                        covered.add(other)
+        covers.append(covered)
+    return covers
+
+
+def optimize_zip_coverage(zip_records, footprint_km=4.0, target_coverage=1.0):
+    """
+    Choose a near-minimal subset of ZIP codes covering the target area
+
+    ZIPs without coordinates cannot be reasoned about and are always kept.
+    Duplicate ZIP codes (several place names for one code) are collapsed.
+
+    Args:
+        zip_records: List of dicts with zip_code, city, latitude, longitude
+        footprint_km: Estimated radius a single Maps search covers
+        target_coverage: Fraction of ZIP centroids that must be covered (0-1)
+
+    Returns:
+        Tuple of (selected records, report dict with estimated coverage and
+        reduction factor)
+    """
+    unique = []
+    seen = set()
+    for record in zip_records:
+        if record["zip_code"] in seen:
+            continue
+        seen.add(record["zip_code"])
+        unique.append(record)
+
+    located = [r for r in unique if r.get("latitude") is not None and r.get("longitude") is not None]
+    unlocated = [r for r in unique if r not in located]
+
+    points = [(float(r["latitude"]), float(r["longitude"])) for r in located]
+    covers = _coverage_sets(points, footprint_km)
+
+    needed = math.ceil(max(0.0, min(1.0, target_coverage)) * len(points))
+    uncovered = set(range(len(points)))
+    chosen = []
+
+    # Greedy set cover: repeatedly take the search reaching the most uncovered centroids
+    while len(points) - len(uncovered) < needed:
+        best = max(range(len(points)), key=lambda idx: len(covers[idx] & uncovered))
+        gain = covers[best] & uncovered
+        if not gain:
+            break
+        chosen.append(best)
+        uncovered -= gain
+
+    selected = [located[idx] for idx in sorted(chosen)] + unlocated
+    original = len(zip_records)
+    report = {
+        "originalQueries": original,
+        "selectedQueries": len(selected),
+        "estimatedCoverage": round((len(points) - len(uncovered)) / len(points), 3) if points else 1.0,
+        "reductionFactor": round(original / len(selected), 2) if selected else 1.0,
+        "footprintKm": footprint_km,
+    }
+    return selected, report
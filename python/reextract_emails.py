@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline Email Re-extraction
+Re-runs email extraction over pages stored in a page archive (scrape_emails.py
+--archive) and rewrites the email column of a results file, using every CPU
+core and no network access. Use it to apply improved filtering to past runs.
+"""
+
+import sys
+import io
+
+# Fix Unicode encoding issues on Windows
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+import os
+import mmap
+import json
+import time
+import argparse
+import multiprocessing
+
+import pandas as pd
+
+from scrape_emails import EmailScraper
+from scrape_history import site_key
+from page_archive import latest_visits, read_page
+from lead_records import read_dataframe, write_dataframe
+
+_pages = None
+_scraper = None
+
+
+def _init_worker(archive_path):
+    """Open the archive and an extractor once per worker process"""
+    global _pages, _scraper
+    with open(archive_path + '.pages', 'rb') as f:
+        _pages = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    _scraper = EmailScraper(headless=True, use_selenium=False)
+
+
+def _extract_visit(item):
+    """
+    Replay one site visit: pages in fetch order, stopping at the first page
+    with emails, as the scraper does
+    """
+    site, entries = item
+    for entry in entries:
+        emails = _scraper.extract_emails_from_text(read_page(_pages, entry))
+        if emails:
+            return site, ', '.join(sorted(emails))
+    return site, 'N/A'
+
+
+def _email_value(value):
+    """Email cell as written to CSV: Parquet / Arrow nulls and blanks are 'N/A'"""
+    if pd.isna(value) or str(value).strip() == '':
+        return 'N/A'
+    return str(value)
+
+
+def _split_emails(value):
+    value = _email_value(value)
+    if value == 'N/A':
+        return set()
+    return {email.strip().lower() for email in value.split(',') if email.strip()}
+
+
+def reextract_emails(archive_path, input_file, output_file=None, website_column='website', workers=None,
+                     keep_verified=None):
+    """
+    Rewrite a results file's email column from archived pages
+
+    SMTP verification needs the network and is not repeated; when keeping
+    verified emails only those already present in the row (i.e. verified
+    when scraped) are kept, so unverified addresses never replace them.
+    By default that is done for every site whose visit was verified, as
+    recorded in the archive; archives written before that was recorded
+    can't tell, and their rows are rewritten with a warning.
+
+    Args:
+        archive_path: Page archive path (without extension)
+        input_file: Results file (CSV, Parquet or Arrow) with website and email columns
+        output_file: Output path (default: <input>_reextracted<ext>)
+        website_column: Name of the column containing website URLs
+        workers: Worker processes (default: all cores)
+        keep_verified: True / False to always / never keep only the emails the row already
+            had, None to decide per site from the archive
+
+    Returns:
+        Dictionary of run statistics
+    """
+    if output_file is None:
+        root, ext = os.path.splitext(input_file)
+        output_file = f"{root}_reextracted{ext}"
+
+    # Keep 'N/A' as written instead of letting pandas turn it into NaN
+    df = read_dataframe(input_file, skipinitialspace=True, quotechar='"', on_bad_lines='skip',
+                        keep_default_na=False, na_values=[''])
+    df.columns = df.columns.str.strip()
+    if website_column not in df.columns:
+        raise ValueError(f"'{website_column}' column not found in {input_file}")
+    if 'email' not in df.columns:
+        df['email'] = 'N/A'
+
+    # Same key the archive files visits under, so shared hosts match per page, not per host
+    sites = {site_key(str(website)) for website in df[website_column] if not pd.isna(website)}
+    visits = [(site, entries) for site, entries in latest_visits(archive_path).items() if site in sites]
+    verified = {site: entries[0].verified for site, entries in visits}
+    print(f"📦 {len(visits)} archived sites match {len(sites)} websites in {input_file}")
+
+    started = time.time()
+    results = {}
+    if visits:
+        with multiprocessing.Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(archive_path,)) as pool:
+            for site, emails in pool.imap_unordered(_extract_visit, visits, chunksize=64):
+                results[site] = emails
+                if len(results) % 1000 == 0:
+                    print(f"[{len(results)}/{len(visits)}] sites re-extracted")
+
+    changed = 0
+    emails_found = 0
+    unknown = 0
+    for idx, website in df[website_column].items():
+        if pd.isna(website):
+            continue
+        site = site_key(str(website))
+        emails = results.get(site)
+        if emails is None:
+            continue
+        current = _email_value(df.at[idx, 'email'])
+        keep = keep_verified if keep_verified is not None else verified[site]
+        if keep is None:
+            unknown += 1
+        elif keep:
+            kept = _split_emails(emails) & _split_emails(current)
+            emails = ', '.join(sorted(kept)) if kept else 'N/A'
+        if emails != current:
+            changed += 1
+        if emails != 'N/A':
+            emails_found += 1
+        df.at[idx, 'email'] = emails
+
+    if unknown:
+        print(f"⚠️  {unknown} rows come from archived visits that don't record whether emails were verified; "
+              f"their emails were replaced unverified (use --keep-verified if that run verified them)",
+              file=sys.stderr)
+
+    write_dataframe(df, output_file)
+
+    return {
+        "sitesReextracted": len(results),
+        "rowsChanged": changed,
+        "rowsVerificationUnknown": unknown,
+        "emailsFound": emails_found,
+        "seconds": round(time.time() - started, 1),
+        "outputFile": output_file,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Re-extract emails from archived pages without re-scraping')
+    parser.add_argument('archive', help='Page archive path (as given to scrape_emails.py --archive)')
+    parser.add_argument('input_file', help='Results file whose email column should be rewritten')
+    parser.add_argument('--output', '-o', help='Path to output file (default: <input>_reextracted)', default=None)
+    parser.add_argument('--website-column', '-w', help='Name of website column', default='website')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)', default=None)
+    parser.add_argument('--keep-verified', dest='keep_verified', action='store_true',
+                        help='Only keep emails the row already had (SMTP verification is not repeated offline; '
+                             'default: for sites whose archived visit was verified)')
+    parser.add_argument('--no-keep-verified', dest='keep_verified', action='store_false',
+                        help='Replace emails with everything re-extracted, even for verified visits')
+    parser.set_defaults(keep_verified=None)
+
+    args = parser.parse_args()
+
+    try:
+        stats = reextract_emails(
+            args.archive,
+            args.input_file,
+            args.output,
+            website_column=args.website_column,
+            workers=args.workers,
+            keep_verified=args.keep_verified
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"\n✅ Re-extracted {stats['sitesReextracted']} sites in {stats['seconds']}s, "
+          f"{stats['rowsChanged']} rows changed → {stats['outputFile']}")
+    print(f"\nJSON_STATS:{json.dumps(stats)}")
@@ -18,6 +18,7 @@ import csv
 import pandas as pd
 import re
 import time
+import os
 import json
 import argparse
 from urllib.parse import urljoin, urlparse
@@ -27,6 +28,12 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
+from driver_manager import ManagedDriver, is_driver_crash
+import job_scheduler
+from scrape_history import ScrapeHistory, DEFAULT_FRESH_DAYS
+from lead_records import read_dataframe, write_dataframe
+from origin_cache import OriginCache
+from page_archive import PageArchive, new_visit_id
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -35,37 +42,36 @@ import dns.resolver
 import socket
 
 class EmailScraper:
-    def __init__(self, headless=True, use_selenium=True):
+    def __init__(self, headless=True, use_selenium=True, recycle_after=200, max_rss_mb=1500, origin_cache=None,
+                 archive=None):
         """
         Initialize email scraper
         
         Args:
             headless: Run browser in headless mode (no visible window)
             use_selenium: Use Selenium for JavaScript-heavy sites (slower but more thorough)
+            recycle_after: Restart the browser after this many sites (0 disables)
+            max_rss_mb: Restart the browser above this memory use in MB (0 disables)
+            origin_cache: OriginCache shared between scrapers (default: a new in-memory one)
+            archive: Optional PageArchive that receives every fetched page for offline re-extraction
         """
         self.use_selenium = use_selenium
-        self.driver = None
+        self.headless = headless
+        self.browser = None
+        self.origins = origin_cache if origin_cache is not None else OriginCache()
+        self.last_url = None  # Canonical URL of the last site scraped
+        self.last_fetched = False  # Whether the last site's main page loaded
+        self.archive = archive
         
         if use_selenium:
-            chrome_options = Options()
-            if headless:
-                chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
+            self.browser = ManagedDriver(self._create_driver, recycle_after=recycle_after, max_rss_mb=max_rss_mb)
             try:
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                self.driver.set_page_load_timeout(20)
+                self.browser.driver
             except Exception as e:
                 print(f"⚠ Warning: Could not initialize Selenium driver: {e}", file=sys.stderr)
                 print("   Falling back to requests-only mode", file=sys.stderr)
                 self.use_selenium = False
+                self.browser = None
         
         # Setup requests session with retry logic
         self.session = requests.Session()
@@ -77,6 +83,29 @@ class EmailScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
+    def _create_driver(self):
+        """Start a new Chrome instance"""
+        chrome_options = Options()
+        if self.headless:
+            chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.set_page_load_timeout(20)
+        return driver
+    
+    @property
+    def driver(self):
+        """Current Selenium driver (restarted automatically by the manager)"""
+        return self.browser.driver if self.browser else None
+    
     def verify_email_smtp(self, email):
         """Verify if email exists using SMTP validation"""
         try:
@@ -92,13 +121,14 @@ class EmailScraper:
             
             # Connect to SMTP server
             try:
-                server = smtplib.SMTP(timeout=10)
-                server.set_debuglevel(0)
-                server.connect(mx_host)
-                server.helo(server.local_hostname)
-                server.mail('verify@example.com')
-                code, message = server.rcpt(email)
-                server.quit()
+                with job_scheduler.outbound(mx_host):
+                    server = smtplib.SMTP(timeout=10)
+                    server.set_debuglevel(0)
+                    server.connect(mx_host)
+                    server.helo(server.local_hostname)
+                    server.mail('verify@example.com')
+                    code, message = server.rcpt(email)
+                    server.quit()
                 
                 # If code is 250, email exists
                 return code == 250
@@ -156,14 +186,29 @@ class EmailScraper:
         
         return filtered_emails
     
-    def scrape_with_requests(self, url, check_pages=True):
-        """Scrape website using requests library (faster)"""
+    def _archive_page(self, visit, site, page_url, html, verified):
+        if self.archive is not None:
+            self.archive.add(visit, site, page_url, html, verified=verified)
+    
+    def scrape_with_requests(self, url, check_pages=True, site=None, verify_emails=None):
+        """
+        Scrape website using requests library (faster)
+
+        site is the website as listed, which archived pages are filed
+        under (default: url); verify_emails is recorded with them.
+        """
         emails = set()
+        visit = new_visit_id()
+        site = site or url
         
         try:
             # Try main page first
-            response = self.session.get(url, timeout=10, allow_redirects=True)
+            with job_scheduler.outbound(url):
+                response = self.session.get(url, timeout=10, allow_redirects=True)
             response.raise_for_status()
+            self.last_fetched = True
+            self.origins.record(url, response.url)
+            self._archive_page(visit, site, response.url, response.text, verify_emails)
             
             emails.update(self.extract_emails_from_text(response.text))
             
@@ -173,9 +218,12 @@ class EmailScraper:
                 
                 for path in contact_paths:
                     try:
-                        contact_url = urljoin(url, path)
-                        contact_response = self.session.get(contact_url, timeout=5, allow_redirects=True)
+                        # Build on the final URL so redirects aren't followed again
+                        contact_url = urljoin(response.url, path)
+                        with job_scheduler.outbound(contact_url):
+                            contact_response = self.session.get(contact_url, timeout=5, allow_redirects=True)
                         contact_response.raise_for_status()
+                        self._archive_page(visit, site, contact_response.url, contact_response.text, verify_emails)
                         found_emails = self.extract_emails_from_text(contact_response.text)
                         if found_emails:
                             emails.update(found_emails)
@@ -188,16 +236,22 @@ class EmailScraper:
         
         return emails
     
-    def scrape_with_selenium(self, url, check_pages=True, verify_emails=True):
-        """Scrape website using Selenium (slower, but works with JavaScript)"""
+    def scrape_with_selenium(self, url, check_pages=True, verify_emails=True, site=None):
+        """Scrape website using Selenium (slower, but works with JavaScript); site as in scrape_with_requests"""
         emails = set()
+        visit = new_visit_id()
+        site = site or url
         
         if not self.driver:
             return emails
         
         try:
             # Load main page
+            job_scheduler.throttle(url)
             self.driver.get(url)
+            self.last_fetched = True
+            base_url = self.driver.current_url
+            self.origins.record(url, base_url)
             time.sleep(3)
             
             # Scroll down to trigger lazy loading
@@ -206,6 +260,7 @@ class EmailScraper:
             
             # Get page source after scrolling
             page_source = self.driver.page_source
+            self._archive_page(visit, site, base_url, page_source, verify_emails)
             emails.update(self.extract_emails_from_text(page_source))
             
             # If no emails found, try to find and navigate to contact pages
@@ -215,7 +270,9 @@ class EmailScraper:
                     
                     for path in contact_paths:
                         try:
-                            contact_url = urljoin(url, path)
+                            # Build on the final URL so redirects aren't followed again
+                            contact_url = urljoin(base_url, path)
+                            job_scheduler.throttle(contact_url)
                             self.driver.get(contact_url)
                             time.sleep(2)
                             
@@ -224,17 +281,23 @@ class EmailScraper:
                             time.sleep(1)
                             
                             contact_source = self.driver.page_source
+                            self._archive_page(visit, site, contact_url, contact_source, verify_emails)
                             found_emails = self.extract_emails_from_text(contact_source)
                             if found_emails:
                                 emails.update(found_emails)
                                 break  # Stop after finding emails
-                        except:
+                        except Exception as e:
+                            if is_driver_crash(e):
+                                raise
                             continue
-                except:
-                    pass
+                except Exception as e:
+                    if is_driver_crash(e):
+                        raise
                     
-        except (TimeoutException, WebDriverException):
-            pass
+        except (TimeoutException, WebDriverException) as e:
+            # A dead browser must surface so the manager can restart it
+            if is_driver_crash(e):
+                raise
         
         return emails
     
@@ -247,20 +310,31 @@ class EmailScraper:
             verify_emails: Whether to verify emails exist (slower but more accurate)
             
         Returns:
-            String of comma-separated verified email addresses or 'N/A'
+            String of comma-separated verified email addresses or 'N/A';
+            whether the site's main page loaded is left in self.last_fetched
+            and, if it did, the site's canonical URL in self.last_url (the
+            given URL otherwise)
         """
+        self.last_url = url
+        self.last_fetched = False
         if not url or url == 'N/A' or url.strip() == '':
             return 'N/A'
         
-        # Ensure URL has protocol
-        if not url.startswith(('http://', 'https://')):
-            url = 'https://' + url
+        # Add a protocol, or move straight to the site's known post-redirect origin
+        site = url
+        url = self.origins.canonical_url(url)
         
         # Use Selenium if available, otherwise fallback to requests
         if self.use_selenium:
-            emails = self.scrape_with_selenium(url, check_pages=True, verify_emails=verify_emails)
+            emails = self.browser.run(self.scrape_with_selenium, url, check_pages=True, verify_emails=verify_emails,
+                                      site=site)
+        else:
+            emails = self.scrape_with_requests(url, check_pages=True, site=site, verify_emails=verify_emails)
+        if self.last_fetched:
+            self.last_url = self.origins.canonical_url(url)
         else:
-            emails = self.scrape_with_requests(url, check_pages=True)
+            # The recorded origin may have moved; resolve it again next time
+            self.origins.forget(url)
         
         # Filter and verify emails
         verified_emails = []
@@ -280,27 +354,45 @@ class EmailScraper:
         else:
             return 'N/A'
     
+    def driver_stats(self):
+        """Browser restart and memory counters for the run summary"""
+        if self.browser:
+            return self.browser.stats()
+        return {"pagesLoaded": 0, "driverRestarts": 0, "driverCrashes": 0, "fairShareYields": 0, "peakRssMb": 0.0}
+    
     def close(self):
         """Close the browser"""
-        if self.driver:
-            self.driver.quit()
+        if self.browser:
+            self.browser.quit()
 
 
-def scrape_emails_from_csv(input_file, output_file=None, website_column='website', delay=2.0, use_selenium=True, verify_emails=True):
+def scrape_emails_from_csv(input_file, output_file=None, website_column='website', delay=2.0, use_selenium=True, verify_emails=True,
+                           recycle_after=200, max_rss_mb=1500, history_file=None, fresh_days=DEFAULT_FRESH_DAYS,
+                           origin_cache_file=None, archive_file=None):
     """
     Scrape email addresses from websites in CSV file with verification
     
     Args:
-        input_file: Path to input CSV file
-        output_file: Path to output CSV file
+        input_file: Path to input CSV, Parquet or Arrow file
+        output_file: Path to output file (.parquet / .arrow for columnar, otherwise CSV)
         website_column: Name of the column containing website URLs
         delay: Delay in seconds between requests (be respectful!)
         use_selenium: Use Selenium for JavaScript-heavy sites
         verify_emails: Verify emails exist using SMTP (slower but more accurate)
+        recycle_after: Restart the browser after this many sites (0 disables)
+        max_rss_mb: Restart the browser above this memory use in MB (0 disables)
+        history_file: Optional scrape history database; websites scraped within
+            fresh_days days reuse their stored emails instead of being visited
+        fresh_days: Freshness window for history_file, in days
+        origin_cache_file: Optional SQLite file persisting each site's post-redirect
+            origin between runs; website values are rewritten to canonical URLs
+        archive_file: Optional page archive path; fetched HTML is appended there
+            so reextract_emails.py can re-run extraction offline
     """
     
     if output_file is None:
-        output_file = input_file.replace('.csv', '_with_emails.csv')
+        root, ext = os.path.splitext(input_file)
+        output_file = f"{root}_with_emails{ext}"
     
     print("=" * 60)
     print("EMAIL SCRAPER FOR WEBSITES")
@@ -309,7 +401,7 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
     
     # Read CSV
     try:
-        df = pd.read_csv(input_file, skipinitialspace=True, quotechar='"', on_bad_lines='skip')
+        df = read_dataframe(input_file, skipinitialspace=True, quotechar='"', on_bad_lines='skip')
         df.columns = df.columns.str.strip()
     except Exception as e:
         print(f"❌ Error reading file: {e}", file=sys.stderr)
@@ -326,7 +418,11 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
     
     # Initialize scraper
     print(f"\n🔧 Initializing scraper (Selenium: {use_selenium})...")
-    scraper = EmailScraper(headless=True, use_selenium=use_selenium)
+    origins = OriginCache(origin_cache_file)
+    archive = PageArchive(archive_file) if archive_file else None
+    scraper = EmailScraper(headless=True, use_selenium=use_selenium, recycle_after=recycle_after, max_rss_mb=max_rss_mb,
+                           origin_cache=origins, archive=archive)
+    history = ScrapeHistory(history_file, fresh_days) if history_file else None
     
     # Add email column if it doesn't exist
     if 'email' not in df.columns:
@@ -362,8 +458,18 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
             print(f"[{idx+1}/{total_rows}] Scraping: {business_name[:50]}")
             print(f"            URL: {website}")
             
-            # Scrape emails with verification
-            emails = scraper.scrape_website(website, verify_emails=verify_emails)
+            cached = history.get_domain(website) if history is not None else None
+            if cached is not None:
+                emails = cached
+                df.at[idx, website_column] = origins.canonical_url(str(website))
+                print(f"            ♻️  From history")
+            else:
+                # Scrape emails with verification
+                emails = scraper.scrape_website(website, verify_emails=verify_emails)
+                # A site that didn't load isn't "no email"; try it again next run
+                if history is not None and scraper.last_fetched:
+                    history.record_domain(website, emails)
+                df.at[idx, website_column] = scraper.last_url
             df.at[idx, 'email'] = emails
             
             if emails != 'N/A':
@@ -373,7 +479,8 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
                 print(f"            ❌ No valid emails found")
             
             # Be respectful - add delay
-            time.sleep(delay)
+            if cached is None:
+                time.sleep(delay)
             
         except Exception as e:
             print(f"            ⚠️  Error: {str(e)}")
@@ -382,15 +489,22 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
         
         # Save progress every 10 rows
         if (idx + 1) % 10 == 0:
-            df.to_csv(output_file, index=False)
+            write_dataframe(df, output_file)
             print(f"\n💾 Progress saved ({idx+1}/{total_rows} processed)\n")
     
     # Close scraper
+    driver_stats = scraper.driver_stats()
     scraper.close()
+    origins.close()
+    if archive is not None:
+        archive.close()
+    from_history = history.domain_hits if history is not None else 0
+    if history is not None:
+        history.close()
     
     # Final save
     print(f"\n💾 Saving final results to: {output_file}")
-    df.to_csv(output_file, index=False)
+    write_dataframe(df, output_file)
     
     # Print summary
     print("\n" + "=" * 60)
@@ -401,6 +515,12 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
     print(f"✅ Emails found:         {emails_found} ({emails_found/total_to_scrape*100 if total_to_scrape > 0 else 0:.1f}%)")
     print(f"❌ No email:             {total_to_scrape - emails_found}")
     print(f"⚠️  Errors:               {errors}")
+    if history is not None:
+        print(f"♻️  From history:         {from_history}")
+    if use_selenium:
+        print(f"🔄 Browser restarts:     {driver_stats['driverRestarts']} ({driver_stats['driverCrashes']} after crashes)")
+        print(f"🤝 Browsers yielded:     {driver_stats['fairShareYields']}")
+        print(f"🧠 Peak browser memory:  {driver_stats['peakRssMb']} MB")
     print("=" * 60)
     
     # Output JSON stats for API consumption
@@ -410,7 +530,13 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
         "emailsFound": emails_found,
         "noEmail": total_to_scrape - emails_found,
         "errors": errors,
-        "successRate": round(emails_found/total_to_scrape*100, 1) if total_to_scrape > 0 else 0
+        "successRate": round(emails_found/total_to_scrape*100, 1) if total_to_scrape > 0 else 0,
+        "driverRestarts": driver_stats["driverRestarts"],
+        "fairShareYields": driver_stats["fairShareYields"],
+        "driverCrashes": driver_stats["driverCrashes"],
+        "peakRssMb": driver_stats["peakRssMb"],
+        "fromHistory": from_history,
+        "schedulerWaitSeconds": job_scheduler.wait_seconds()
     }
     print(f"\nJSON_STATS:{json.dumps(stats)}")
     
@@ -419,16 +545,26 @@ def scrape_emails_from_csv(input_file, output_file=None, website_column='website
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Scrape email addresses from websites in CSV file')
-    parser.add_argument('input_file', help='Path to input CSV file')
-    parser.add_argument('--output', '-o', help='Path to output CSV file', default=None)
+    parser.add_argument('input_file', help='Path to input CSV, Parquet or Arrow file')
+    parser.add_argument('--output', '-o', help='Path to output file (.parquet / .arrow for columnar, otherwise CSV)', default=None)
     parser.add_argument('--website-column', '-w', help='Name of website column', default='website')
     parser.add_argument('--delay', '-d', type=float, help='Delay between requests (seconds)', default=2.0)
     parser.add_argument('--selenium', '-s', action='store_true', help='Use Selenium (slower but more thorough)')
     parser.add_argument('--fast', action='store_true', help='Use requests only (faster but may miss emails)')
     parser.add_argument('--no-verify', action='store_true', help='Skip email verification (faster but less accurate)')
+    parser.add_argument('--recycle-after', type=int, help='Restart the browser after this many sites (0 = never)', default=200)
+    parser.add_argument('--max-rss-mb', type=int, help='Restart the browser above this memory use in MB (0 = no limit)', default=1500)
+    parser.add_argument('--history-file', help='Scrape history database; skips recently scraped websites', default=None)
+    parser.add_argument('--fresh-days', type=float, help='Reuse history results younger than this many days', default=DEFAULT_FRESH_DAYS)
+    parser.add_argument('--origin-cache', help='SQLite file remembering where each site redirects to, reused across runs', default=None)
+    parser.add_argument('--archive', help='Append fetched pages to this archive for offline re-extraction', default=None)
+    parser.add_argument('--priority', type=int, help='Scheduling priority against other jobs on this machine (higher first)', default=0)
     
     args = parser.parse_args()
     
+    # Share browsers, connections and request rates with other jobs on this machine
+    job_scheduler.register_job('scrape_emails', priority=args.priority)
+    
     # Determine which mode to use
     use_selenium = args.selenium or not args.fast
     
@@ -447,11 +583,18 @@ if __name__ == "__main__":
         website_column=args.website_column,
         delay=args.delay,
         use_selenium=use_selenium,
-        verify_emails=not args.no_verify
+        verify_emails=not args.no_verify,
+        recycle_after=args.recycle_after,
+        max_rss_mb=args.max_rss_mb,
+        history_file=args.history_file,
+        fresh_days=args.fresh_days,
+        origin_cache_file=args.origin_cache,
+        archive_file=args.archive
     )
     
     if result_df is not None:
-        output_file = args.output or args.input_file.replace('.csv', '_with_emails.csv')
+        root, ext = os.path.splitext(args.input_file)
+        output_file = args.output or f"{root}_with_emails{ext}"
         print(f"\n✅ Success! Results saved to: {output_file}")
         print(f"\n💡 Tips:")
         print(f"   • Use --selenium for JavaScript-heavy sites (slower but more thorough)")
@@ -8,7 +8,11 @@ if sys.platform == 'win32':
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 import csv
+import json
+import os
 import time
+import queue
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -17,13 +21,105 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
+from driver_manager import ManagedDriver, is_driver_crash
+import job_scheduler
+from place_index import PlaceIndex
+from geo_tiles import TileHistory, TileRefiner, read_tile_rows
+from scrape_history import ScrapeHistory, DEFAULT_FRESH_DAYS
+from lead_records import LeadTable, is_columnar, read_records, write_records
 import re
 
+# Collects what each result card already shows in a single round trip
+FEED_CARDS_SCRIPT = """
+const cards = Array.from(document.querySelectorAll("div[role='feed'] > div > div[jsaction]")).slice(0, arguments[0]);
+const text = (el) => (el && el.textContent ? el.textContent.trim() : '');
+return cards.map((card) => {
+    const link = card.querySelector("a.hfpxzc") || card.querySelector("a[href*='/maps/place/']");
+    const stars = card.querySelector("span[role='img'][aria-label]");
+    const website = card.querySelector("a[data-value='Website']");
+    const info = card.querySelector("div.W4Efsd div.W4Efsd");
+    return {
+        name: text(card.querySelector(".qBF1Pd, .fontHeadlineSmall")) || (link ? link.getAttribute('aria-label') || '' : ''),
+        place_url: link ? link.href : '',
+        stars: stars ? stars.getAttribute('aria-label') : '',
+        rating: text(card.querySelector("span.MW4etd")),
+        reviews: text(card.querySelector("span.UY7F9")),
+        phone: text(card.querySelector("span.UsdlK")),
+        website: website ? website.href : '',
+        info: text(info)
+    };
+});
+"""
+
+# Number of loaded result cards and whether Maps has shown the end-of-list marker
+FEED_STATE_SCRIPT = """
+const feed = arguments[0];
+const count = feed.querySelectorAll(":scope > div > div[jsaction]").length;
+const last = feed.lastElementChild;
+const atEnd = !!feed.querySelector("span.HlvSq") || !!(last && last.innerText && last.innerText.includes("end of the list"));
+return [count, atEnd];
+"""
+
+# Reads every detail panel field in a single round trip
+DETAILS_SCRIPT = """
+const q = (selector) => document.querySelector(selector);
+const name = q("h1.DUwDvf");
+const stars = q("div.F7nice span[aria-label*='star']");
+const phone = q("button[data-item-id*='phone']");
+const website = q("a[data-item-id*='authority']");
+const address = q("button[data-item-id*='address']");
+const category = q("button.DkEaL");
+return JSON.stringify({
+    name: name ? name.innerText : null,
+    rating_label: stars ? stars.getAttribute('aria-label') : null,
+    rating_parent: stars && stars.parentElement ? stars.parentElement.innerText : null,
+    phone_id: phone ? phone.getAttribute('data-item-id') : null,
+    phone_text: phone ? phone.innerText : null,
+    website: website ? website.href : null,
+    address: address ? address.getAttribute('aria-label') : null,
+    category: category ? category.innerText : null,
+    url: location.href
+});
+"""
+
+# Cards missing a website or phone are opened to check the detail panel for them
+CARD_DETAIL_FIELDS = ('website', 'phone')
+
+# Fields the detail panel has in full where a card only shows part (the card's
+# info line carries the street alone, without city, state and ZIP)
+PANEL_FIELDS = ('address',)
+
 class GoogleMapsScraper:
-    def __init__(self, headless=False):
-        """Initialize the scraper with Chrome driver"""
+    def __init__(self, headless=False, recycle_after=50, max_rss_mb=1500, feed_first=True, detail_fields=CARD_DETAIL_FIELDS,
+                 place_index=None):
+        """
+        Initialize the scraper with Chrome driver
+        
+        Args:
+            headless: Run browser in headless mode
+            recycle_after: Restart the browser after this many searches (0 disables)
+            max_rss_mb: Restart the browser above this memory use in MB (0 disables)
+            feed_first: Read listings from the results feed and only open the
+                detail panel for businesses still missing detail_fields
+            detail_fields: Fields whose absence from a card justifies clicking
+                into it; add 'address' to open every card for its full address
+            place_index: Optional PlaceIndex shared across searches; places
+                already in it are returned with their feed data instead of
+                having their card opened (the caller applies the index)
+        """
+        self.headless = headless
+        self.feed_first = feed_first
+        self.detail_fields = detail_fields
+        self.place_index = place_index
+        self.last_card_count = 0  # Listings found by the last search, for saturation checks
+        self.last_search_complete = False  # False when the last search timed out or failed part way
+        self.browser = ManagedDriver(self._create_driver, recycle_after=recycle_after, max_rss_mb=max_rss_mb)
+        self.browser.driver
+    
+    def _create_driver(self):
+        """Start a new Chrome instance"""
         chrome_options = Options()
-        if headless:
+        if self.headless:
             chrome_options.add_argument("--headless")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
@@ -33,21 +129,32 @@ class GoogleMapsScraper:
         
         # Use webdriver-manager to automatically handle ChromeDriver
         service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 10)
+        return webdriver.Chrome(service=service, options=chrome_options)
+    
+    @property
+    def driver(self):
+        """Current Selenium driver (restarted automatically by the manager)"""
+        return self.browser.driver
+    
+    @property
+    def wait(self):
+        return WebDriverWait(self.driver, 10)
         
     def scrape_search_results(self, url, max_results=20):
         """Scrape business information from a Google Maps search URL"""
+        return self.browser.run(self._scrape_search_results, url, max_results)
+    
+    def _scrape_search_results(self, url, max_results):
         print(f"\nScraping: {url}", file=sys.stderr)
+        job_scheduler.throttle(url)
         self.driver.get(url)
         
-        # Wait for results to load
-        time.sleep(3)
-        
         businesses = []
+        self.last_card_count = 0
+        self.last_search_complete = False
         
         try:
-            # Scroll through results to load more
+            # Wait for the results feed to render
             results_panel = self.wait.until(
                 EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']"))
             )
@@ -59,53 +166,235 @@ class GoogleMapsScraper:
             business_cards = self.driver.find_elements(By.CSS_SELECTOR, "div[role='feed'] > div > div[jsaction]")
             
             print(f"Found {len(business_cards)} businesses")
+            self.last_card_count = min(len(business_cards), max_results)
+            
+            # The feed also carries each card's place link, used for dedupe
+            read_feed = self.feed_first or self.place_index is not None
+            feed_data = self._extract_feed_cards(max_results) if read_feed else []
+            detail_opens = 0
+            known_skipped = 0
+            shown_url = None
             
             for idx, card in enumerate(business_cards[:max_results], 1):
                 try:
-                    # Click on the business card to open details
-                    card.click()
-                    time.sleep(2)  # Wait for details to load
+                    listing = feed_data[idx - 1] if idx <= len(feed_data) else None
+                    
+                    # Places already scraped by an overlapping search keep their feed data; the
+                    # caller drops them, but the search's full result list is still returned
+                    if listing and self.place_index is not None and self.place_index.contains(listing):
+                        known_skipped += 1
+                        businesses.append(listing)
+                        continue
                     
-                    business_data = self._extract_business_details()
+                    business_data = listing if self.feed_first else None
+                    
+                    if business_data is None or self._needs_details(business_data):
+                        # Click on the business card to open details
+                        card.click()
+                        shown_url = self._wait_for_details(shown_url)
+                        detail_opens += 1
+                        
+                        business_data = self._merge_details(business_data, self._extract_business_details())
                     
                     if business_data:
                         businesses.append(business_data)
                     print(f"Scraped: {business_data['name']}", file=sys.stderr)
                     
                 except Exception as e:
+                    if is_driver_crash(e):
+                        raise
                     print(f"Error extracting business {idx}: {str(e)}", file=sys.stderr)
                     continue
+            
+            if self.feed_first:
+                print(f"Opened detail panel for {detail_opens}/{min(len(business_cards), max_results)} businesses", file=sys.stderr)
+            if known_skipped:
+                print(f"Skipped detail panel for {known_skipped} already-known places", file=sys.stderr)
+            self.last_search_complete = True
                     
         except TimeoutException:
             print("WARNING: Timeout waiting for results to load", file=sys.stderr)
         except Exception as e:
+            # A dead browser must surface so the manager can restart it and retry this URL
+            if is_driver_crash(e):
+                raise
             print(f"ERROR: Error during scraping: {str(e)}", file=sys.stderr)
             
         return businesses
     
-    def _scroll_results_panel(self, panel, max_results):
-        """Scroll through the results panel to load more businesses"""
-        last_height = self.driver.execute_script("return arguments[0].scrollHeight", panel)
+    def _extract_feed_cards(self, max_results):
+        """
+        Read listing data straight from the result cards without clicking them
+        
+        Returns:
+            List of business dicts in card order (empty if the feed could not be read)
+        """
+        try:
+            cards = self.driver.execute_script(FEED_CARDS_SCRIPT, max_results) or []
+        except Exception as e:
+            if is_driver_crash(e):
+                raise
+            print(f"WARNING: Could not read results feed, opening every card: {str(e)}", file=sys.stderr)
+            return []
+        
+        businesses = []
+        for card in cards:
+            business = {
+                'name': card.get('name') or 'N/A',
+                'phone': card.get('phone') or 'N/A',
+                'website': card.get('website') or 'N/A',
+                'rating': 'N/A',
+                'reviews': '0',
+                'address': 'N/A',
+                'category': 'N/A',
+                'place_url': card.get('place_url') or ''
+            }
+            
+            # Rating and reviews (e.g., "4.5" and "(123)", or "4.5 stars 123 Reviews")
+            rating_match = re.search(r'(\d+\.?\d*)', card.get('rating') or '')
+            if not rating_match:
+                rating_match = re.search(r'(\d+\.?\d*)\s*star', card.get('stars') or '')
+            if rating_match:
+                business['rating'] = rating_match.group(1)
+            
+            review_match = re.search(r'\(?([\d,]+)\)?', card.get('reviews') or '')
+            if not review_match:
+                review_match = re.search(r'([\d,]+)\s*Review', card.get('stars') or '')
+            if review_match:
+                business['reviews'] = review_match.group(1).replace(',', '')
+            
+            # Info line looks like "Plumber · 123 Main St"; the street alone isn't an address,
+            # which is left for the detail panel
+            parts = [part.strip() for part in (card.get('info') or '').split('·') if part.strip()]
+            if parts:
+                business['category'] = parts[0]
+            
+            businesses.append(business)
+        
+        return businesses
+    
+    def _needs_details(self, business):
+        """Check whether a feed listing is still missing fields only the detail panel has"""
+        return any(business.get(field) in ('', 'N/A', None) for field in self.detail_fields)
+    
+    def _merge_details(self, feed_business, details):
+        """Fill fields missing from the feed listing with values from the detail panel, whose address always wins"""
+        if not feed_business:
+            return details
+        
+        merged = dict(feed_business)
+        for key, value in details.items():
+            missing = merged.get(key) in ('', 'N/A', None) or (key == 'reviews' and merged.get(key) == '0')
+            if (missing or key in PANEL_FIELDS) and value not in ('', 'N/A', None):
+                merged[key] = value
+        return merged
+    
+    def _scroll_results_panel(self, panel, max_results, max_scrolls=10, scroll_timeout=4):
+        """
+        Scroll through the results panel until max_results cards are loaded
+        
+        Each scroll waits only until new cards appear or the end-of-list
+        marker shows up, instead of sleeping a fixed interval.
+        """
+        card_count, at_end = self._feed_state(panel)
         scroll_attempts = 0
-        max_scrolls = 10
         
-        while scroll_attempts < max_scrolls:
+        while card_count < max_results and not at_end and scroll_attempts < max_scrolls:
             # Scroll down
             self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", panel)
-            time.sleep(2)
+            scroll_attempts += 1
             
-            # Calculate new scroll height
-            new_height = self.driver.execute_script("return arguments[0].scrollHeight", panel)
+            previous_count = card_count
             
-            # Check if we've reached the bottom
-            if new_height == last_height:
+            def feed_grew(driver):
+                count, end = self._feed_state(panel)
+                return (count, end) if count > previous_count or end else False
+            
+            try:
+                card_count, at_end = WebDriverWait(self.driver, scroll_timeout, poll_frequency=0.25).until(feed_grew)
+            except TimeoutException:
+                # Nothing new loaded; the feed is exhausted
                 break
-                
-            last_height = new_height
-            scroll_attempts += 1
+    
+    def _feed_state(self, panel):
+        """Return (loaded card count, end-of-list reached) for the results feed"""
+        return self.driver.execute_script(FEED_STATE_SCRIPT, panel)
+    
+    def _wait_for_details(self, previous_url, timeout=5):
+        """
+        Wait until the detail panel shows a place other than previous_url
+        
+        The page URL switches to the opened place's /maps/place/ link, which
+        differs per place even when branches of a chain share a name.
+        
+        Returns:
+            The URL of the place now shown (or previous_url on timeout)
+        """
+        def shown_place(driver):
+            url, has_name = driver.execute_script("return [location.href, !!document.querySelector('h1.DUwDvf')];")
+            return url if has_name and '/maps/place/' in url and url != previous_url else False
+        
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(shown_place)
+        except TimeoutException:
+            return previous_url
     
     def _extract_business_details(self):
         """Extract business details from the opened business panel"""
+        try:
+            raw = json.loads(self.driver.execute_script(DETAILS_SCRIPT))
+            return self._parse_business_details(raw)
+        except Exception as e:
+            if is_driver_crash(e):
+                raise
+            print(f"WARNING: Detail script failed, reading fields one by one: {str(e)}", file=sys.stderr)
+            return self._extract_business_details_per_field()
+    
+    def _parse_business_details(self, raw):
+        """Turn the raw values returned by DETAILS_SCRIPT into a business dict"""
+        business = {
+            'name': raw.get('name') or "N/A",
+            'phone': "N/A",
+            'website': raw.get('website') or "N/A",
+            'rating': '',
+            'reviews': '',
+            'address': "N/A",
+            'category': raw.get('category') or "N/A",
+            'place_url': ''
+        }
+        
+        # Rating and reviews
+        if raw.get('rating_label') is not None:
+            rating_match = re.search(r'(\d+\.?\d*)\s*star', raw['rating_label'])
+            if rating_match:
+                business['rating'] = rating_match.group(1)
+            
+            # Prefer the parenthesised count so the rating digits aren't picked up
+            review_match = (re.search(r'\(([\d,]+)\)', raw.get('rating_parent') or '')
+                            or re.search(r'\(?([\d,]+)\)?', raw.get('rating_parent') or ''))
+            if review_match:
+                business['reviews'] = review_match.group(1).replace(',', '')
+        else:
+            business['rating'] = "N/A"
+            business['reviews'] = "0"
+        
+        # Phone number
+        if raw.get('phone_id') is not None or raw.get('phone_text') is not None:
+            phone_match = re.search(r'phone:tel:(.+)', raw.get('phone_id') or '')
+            business['phone'] = phone_match.group(1) if phone_match else (raw.get('phone_text') or '')
+        
+        # Address
+        if raw.get('address') is not None:
+            business['address'] = raw['address'].replace("Address: ", "")
+        
+        # Place link (the URL switches to /maps/place/... once a card is open)
+        if '/maps/place/' in (raw.get('url') or ''):
+            business['place_url'] = raw['url']
+        
+        return business
+    
+    def _extract_business_details_per_field(self):
+        """Extract business details with one WebDriver call per field (fallback path)"""
         business = {
             'name': '',
             'phone': '',
@@ -113,7 +402,8 @@ class GoogleMapsScraper:
             'rating': '',
             'reviews': '',
             'address': '',
-            'category': ''
+            'category': '',
+            'place_url': ''
         }
         
         try:
@@ -177,86 +467,435 @@ class GoogleMapsScraper:
                 business['category'] = category_button.text
             except NoSuchElementException:
                 business['category'] = "N/A"
+            
+            # Place link (the URL switches to /maps/place/... once a card is open)
+            if '/maps/place/' in self.driver.current_url:
+                business['place_url'] = self.driver.current_url
                 
         except Exception as e:
+            if is_driver_crash(e):
+                raise
             print(f"ERROR: Error extracting details: {str(e)}", file=sys.stderr)
             
         return business
     
+    def driver_stats(self):
+        """Browser restart and memory counters for the run summary"""
+        return self.browser.stats()
+    
     def close(self):
         """Close the browser"""
-        self.driver.quit()
+        self.browser.quit()
+
+BUSINESS_FIELDS = ['name', 'phone', 'website', 'rating', 'reviews', 'address', 'category', 'place_url']
 
 def save_to_csv(businesses, filename="boise_google_maps_results.csv"):
-    """Save scraped business data to CSV file"""
+    """Save scraped business data to a CSV, Parquet or Arrow IPC file"""
     if not businesses:
         print("WARNING: No businesses to save", file=sys.stderr)
         return
     
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        fieldnames = ['name', 'phone', 'website', 'rating', 'reviews', 'address', 'category']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        writer.writerows(businesses)
+    write_records(businesses, filename, BUSINESS_FIELDS)
     
     print(f"\nSaved {len(businesses)} businesses to {filename}", file=sys.stderr)
 
-def scrape_from_file(csv_file="boise_queries.csv", output_file="boise_scraped_results.csv", max_per_search=20):
-    """Scrape businesses from URLs in a CSV file"""
-    scraper = GoogleMapsScraper(headless=False)  # Set to True for headless mode
-    all_businesses = []
+class IncrementalResultWriter:
+    def __init__(self, output_file, resume=True):
+        """
+        Append businesses to the output CSV as they are scraped
+        
+        A journal next to the output (<output_file>.journal) lists every
+        search URL whose results are fully written, so a rerun with
+        resume=True continues where the previous run stopped.
+        
+        Parquet / Arrow outputs cannot be appended to, so rows are staged in
+        <output_file>.partial.csv and converted when the writer is closed.
+        
+        Args:
+            output_file: Path to the output file (.parquet / .arrow for columnar, otherwise CSV)
+            resume: Keep existing output and journal instead of starting over
+        """
+        self.output_file = output_file
+        self.journal_file = output_file + '.journal'
+        self.columnar = is_columnar(output_file)
+        self.csv_path = output_file + '.partial.csv' if self.columnar else output_file
+        self.completed_urls = set()
+        self.existing_rows = 0
+        self.rows_written = 0
+        
+        if resume and os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                self.completed_urls = {line.strip() for line in f if line.strip()}
+        
+        if self.columnar and resume and os.path.exists(output_file) and not os.path.exists(self.csv_path):
+            # Resuming a finished columnar run: stage its rows so new ones can be appended
+            write_records(read_records(output_file), self.csv_path, BUSINESS_FIELDS)
+        
+        fieldnames = BUSINESS_FIELDS
+        has_rows = resume and os.path.exists(self.csv_path) and os.path.getsize(self.csv_path) > 0
+        if has_rows:
+            # Keep the existing header so rows written by older versions still line up
+            with open(self.csv_path, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames or BUSINESS_FIELDS
+                self.existing_rows = sum(1 for _ in reader)
+        
+        self._csv_file = open(self.csv_path, 'a' if has_rows else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._csv_file, fieldnames=fieldnames, extrasaction='ignore')
+        if not has_rows:
+            self._writer.writeheader()
+            self._csv_file.flush()
+        self._journal = open(self.journal_file, 'a' if resume else 'w', encoding='utf-8')
     
-    try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            urls = []
-            for row in reader:
-                # Handle potential whitespace in column names
-                # Create a dictionary with stripped keys
-                clean_row = {k.strip(): v for k, v in row.items() if k}
+    @property
+    def total_rows(self):
+        """Rows in the output file, including those from earlier runs"""
+        return self.existing_rows + self.rows_written
+    
+    def pending(self, urls):
+        """Search URLs not yet completed by a previous run"""
+        return [url for url in urls if url not in self.completed_urls]
+    
+    def existing_businesses(self):
+        """Yield businesses already in the output file (e.g. to seed a PlaceIndex)"""
+        if not self.existing_rows:
+            return
+        with open(self.csv_path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                yield row
+    
+    def write(self, url, businesses):
+        """Append one search's businesses, then mark the URL as done"""
+        if businesses:
+            self._writer.writerows(businesses)
+            self._csv_file.flush()
+            self.rows_written += len(businesses)
+        
+        self._journal.write(url + '\n')
+        self._journal.flush()
+        self.completed_urls.add(url)
+    
+    def close(self):
+        """Close the output and journal files, converting staged rows for columnar outputs"""
+        self._csv_file.close()
+        self._journal.close()
+        if self.columnar:
+            write_records(read_records(self.csv_path), self.output_file, self._writer.fieldnames)
+            os.remove(self.csv_path)
+
+class RateLimiter:
+    def __init__(self, per_minute=0):
+        """
+        Space out search starts across every browser in the pool
+        
+        Args:
+            per_minute: Maximum searches started per minute (0 = unlimited)
+        """
+        self.interval = 60.0 / per_minute if per_minute else 0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+    
+    def wait(self):
+        """Block until the caller may start its next search"""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0, slot - now))
+
+def merge_driver_stats(stats_list):
+    """Combine driver counters from several browsers into one summary"""
+    merged = {"pagesLoaded": 0, "driverRestarts": 0, "driverCrashes": 0, "fairShareYields": 0, "peakRssMb": 0.0}
+    for stats in stats_list:
+        merged["pagesLoaded"] += stats["pagesLoaded"]
+        merged["driverRestarts"] += stats["driverRestarts"]
+        merged["fairShareYields"] += stats["fairShareYields"]
+        merged["driverCrashes"] += stats["driverCrashes"]
+        merged["peakRssMb"] = max(merged["peakRssMb"], stats["peakRssMb"])
+    return merged
+
+def scrape_urls(urls, max_results=20, pool_size=1, delay=2, rate_limit=0, headless=False,
+                recycle_after=50, max_rss_mb=1500, feed_first=True, detail_fields=CARD_DETAIL_FIELDS, place_index=None,
+                keep_results=True, on_result=None, on_progress=None, on_error=None, expand=None, history=None):
+    """
+    Scrape search URLs concurrently with a bounded pool of browsers
+    
+    Each worker thread owns one GoogleMapsScraper and pulls URLs from a shared
+    queue, so at most pool_size Chrome instances run at once.
+    
+    Args:
+        urls: Google Maps search URLs
+        max_results: Maximum businesses per search
+        pool_size: Number of browsers scraping in parallel
+        delay: Pause in seconds between searches on the same browser
+        rate_limit: Maximum searches started per minute across the pool (0 = unlimited)
+        headless: Run browsers in headless mode
+        recycle_after: Restart each browser after this many searches (0 disables)
+        max_rss_mb: Restart a browser above this memory use in MB (0 disables)
+        feed_first: Read listings from the results feed, opening cards only for missing fields
+        detail_fields: Fields whose absence from a card opens its detail panel
+        place_index: Optional PlaceIndex shared by every browser to skip duplicate places
+        keep_results: Collect businesses for the return value; pass False when
+            on_result already streams them to disk
+        on_result: Called as on_result(url, businesses) after each successful
+            search; calls are serialized
+        on_progress: Called as on_progress(completed, total, business_count, businesses)
+            after each search; calls are serialized
+        on_error: Called as on_error(url, error) when a search fails
+        expand: Called as expand(url, businesses, card_count) after each
+            successful search; returns further URLs to queue (e.g. the
+            quadrants of a saturated map tile); calls are serialized
+        history: Optional ScrapeHistory; searches scraped within its freshness
+            window are served from it instead of the browser, and new
+            searches are recorded
+    
+    Returns:
+        Tuple of (businesses in URL order, merged driver stats); the list is
+        empty when keep_results is False
+    """
+    total = len(urls)
+    if not total:
+        return [], merge_driver_stats([])
+    results = [None] * total
+    work = queue.Queue()
+    for idx, url in enumerate(urls):
+        work.put((idx, url))
+    
+    limiter = RateLimiter(rate_limit)
+    lock = threading.Lock()
+    # "queued" counts URLs not yet finished; workers stay alive while any are
+    # in flight because expand can still add more
+    counts = {"completed": 0, "businesses": 0, "total": total, "queued": total}
+    all_stats = []
+    
+    def worker():
+        try:
+            scraper = GoogleMapsScraper(headless=headless, recycle_after=recycle_after, max_rss_mb=max_rss_mb,
+                                        feed_first=feed_first, detail_fields=detail_fields, place_index=place_index)
+        except Exception as e:
+            print(f"ERROR: Could not start browser: {str(e)}", file=sys.stderr)
+            return
+        
+        try:
+            first = True
+            while True:
+                try:
+                    idx, url = work.get(timeout=0.5)
+                except queue.Empty:
+                    with lock:
+                        if counts["queued"] == 0:
+                            break
+                    continue
                 
-                if 'Google Maps URL' in clean_row:
-                    urls.append(clean_row['Google Maps URL'])
+                failed = False
+                cached = history.get_search(url) if history is not None else None
+                if cached is not None:
+                    # Scraped recently - reuse the stored results without opening the page
+                    businesses, card_count = cached
                 else:
-                    # Fallback: try to find a key that looks like the URL column
-                    for key in row.keys():
-                        if key and 'Google Maps URL' in key:
-                            urls.append(row[key])
-                            break
-        
+                    # Be respectful - add delay between searches
+                    if not first and delay:
+                        time.sleep(delay)
+                    first = False
+                    limiter.wait()
+                    
+                    try:
+                        businesses = scraper.scrape_search_results(url, max_results=max_results)
+                        card_count = scraper.last_card_count
+                        # Full results, before dedupe; timed-out searches aren't worth reusing
+                        if history is not None and scraper.last_search_complete:
+                            history.record_search(url, businesses, card_count)
+                    except Exception as e:
+                        businesses = []
+                        failed = True
+                        if on_error:
+                            on_error(url, e)
+                
+                # Places are only claimed once their search has fully succeeded, so a
+                # search retried after a browser crash doesn't find its own places taken
+                if place_index is not None:
+                    businesses = [business for business in businesses if place_index.add(business)]
+                
+                with lock:
+                    saved = False
+                    try:
+                        if keep_results:
+                            results[idx] = businesses
+                        # Expand first so e.g. a tile's count is saved before on_result journals it as done
+                        if expand and not failed:
+                            for new_url in expand(url, businesses, card_count):
+                                results.append(None)
+                                work.put((len(results) - 1, new_url))
+                                counts["total"] += 1
+                                counts["queued"] += 1
+                        if on_result and not failed:
+                            on_result(url, businesses)
+                        saved = True
+                    finally:
+                        if place_index is not None:
+                            # Only places whose rows were written go on file; a resumed run
+                            # scrapes this search again and must not drop them as duplicates
+                            if saved:
+                                place_index.persist(businesses)
+                            else:
+                                place_index.discard(businesses)
+                        # Even if a callback raised, or the other workers would wait for this URL forever
+                        counts["completed"] += 1
+                        counts["queued"] -= 1
+                    counts["businesses"] += len(businesses)
+                    if on_progress:
+                        on_progress(counts["completed"], counts["total"], counts["businesses"], businesses)
+        finally:
+            with lock:
+                all_stats.append(scraper.driver_stats())
+            scraper.close()
+    
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(pool_size, total)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Anything left over means every browser failed to start
+    while not work.empty():
+        idx, url = work.get_nowait()
+        if on_error:
+            on_error(url, RuntimeError("No browser available to scrape URL"))
+    
+    all_businesses = []
+    for businesses in results:
+        if businesses:
+            all_businesses.extend(businesses)
+    
+    return all_businesses, merge_driver_stats(all_stats)
+
+URL_COLUMNS = ('google_maps_url', 'Google Maps URL')
+
+def _search_url(row):
+    """The search URL of a query file row, whichever header spelling it uses"""
+    for column in URL_COLUMNS:
+        if column in row:
+            return row[column]
+    # Fallback: a header that merely contains the column name
+    for key, value in row.items():
+        if any(column in key for column in URL_COLUMNS):
+            return value
+    return None
+
+def read_urls_from_csv(csv_file):
+    """Read Google Maps search URLs from a query generator CSV (or Parquet / Arrow) file"""
+    urls = []
+    # read_records strips header whitespace and returns the same rows for every format
+    for row in read_records(csv_file):
+        url = _search_url(row)
+        if url and url != 'N/A':
+            urls.append(url.strip())
+    return urls
+
+def scrape_from_file(csv_file="boise_queries.csv", output_file="boise_scraped_results.csv", max_per_search=20,
+                     recycle_after=50, max_rss_mb=1500, pool_size=1, rate_limit=0, headless=False, feed_first=True,
+                     dedupe=True, place_index_file=None, resume=True, tile_plan_file=None, min_tile_km=0.5,
+                     history_file=None, fresh_days=DEFAULT_FRESH_DAYS):
+    """
+    Scrape businesses from URLs in a CSV file
+    
+    Tile CSVs from the query generator's tile mode are detected by their
+    tile_key column; saturated tiles are then split into quadrants and
+    searched too, and each tile's result count is saved to tile_plan_file
+    (default: <output_file>.tiles.json) as soon as the tile is done, so a
+    resumed run also searches the quadrants of tiles finished before it.
+    
+    With history_file, searches scraped in the last fresh_days days are
+    merged in from the history instead of being scraped again.
+    
+    Returns:
+        LeadTable of the businesses scraped in this run
+    """
+    all_businesses = LeadTable()
+    place_index = PlaceIndex(place_index_file) if dedupe else None
+    history = ScrapeHistory(history_file, fresh_days) if history_file else None
+    writer = None
+    refiner = None
+    
+    try:
+        tile_rows = read_tile_rows(csv_file)
+        if tile_rows and 'tile_key' in tile_rows[0]:
+            refiner = TileRefiner(tile_rows, TileHistory(tile_plan_file or output_file + '.tiles.json'),
+                                  saturation=max_per_search, min_tile_km=min_tile_km)
+            urls = refiner.urls
+        else:
+            urls = read_urls_from_csv(csv_file)
         print(f"Found {len(urls)} URLs to scrape", file=sys.stderr)
         
-        for idx, url in enumerate(urls, 1):
-            print(f"\n--- Processing URL {idx}/{len(urls)} ---")
-            businesses = scraper.scrape_search_results(url, max_results=max_per_search)
+        writer = IncrementalResultWriter(output_file, resume=resume)
+        # Tiles: finished saturated tiles contribute the quadrants still to search
+        pending_urls = refiner.pending(writer.completed_urls) if refiner is not None else writer.pending(urls)
+        already_done = len(writer.completed_urls) if refiner is not None else len(urls) - len(pending_urls)
+        if already_done:
+            print(f"Resuming: {already_done} URLs already done, "
+                  f"{writer.existing_rows} businesses in {output_file}", file=sys.stderr)
+            if place_index is not None:
+                for business in writer.existing_businesses():
+                    place_index.add(business)
+        
+        def on_result(url, businesses):
+            writer.write(url, businesses)
             all_businesses.extend(businesses)
-            
-            # Save progress periodically
-            if idx % 5 == 0:
-                save_to_csv(all_businesses, output_file)
-                print(f"Progress saved: {len(all_businesses)} total businesses", file=sys.stderr)
-            
-            # Be respectful - add delay between searches
-            if idx < len(urls):
-                time.sleep(3)
         
-        # Final save
-        save_to_csv(all_businesses, output_file)
+        def on_progress(completed, total, business_count, businesses):
+            print(f"\n--- Completed URL {completed}/{total} ---")
+        
+        def on_error(url, error):
+            print(f"ERROR: {url}: {str(error)}", file=sys.stderr)
+        
+        _, stats = scrape_urls(
+            pending_urls,
+            max_results=max_per_search,
+            pool_size=pool_size,
+            delay=3,
+            rate_limit=rate_limit,
+            headless=headless,
+            recycle_after=recycle_after,
+            max_rss_mb=max_rss_mb,
+            feed_first=feed_first,
+            place_index=place_index,
+            keep_results=False,
+            on_result=on_result,
+            on_progress=on_progress,
+            on_error=on_error,
+            expand=refiner.expand if refiner is not None else None,
+            history=history
+        )
+        if refiner is not None:
+            refiner.history.save()
+            print(f"Saturated tiles subdivided: {refiner.subdivided}", file=sys.stderr)
+        if history is not None:
+            print(f"Searches reused from history: {history.search_hits}", file=sys.stderr)
+        if place_index is not None:
+            print(f"Duplicate places skipped: {place_index.duplicates}", file=sys.stderr)
+        print(f"Browser restarts: {stats['driverRestarts']} ({stats['driverCrashes']} after crashes), "
+              f"given to other jobs: {stats['fairShareYields']}, peak memory: {stats['peakRssMb']} MB", file=sys.stderr)
+        print(f"\nSaved {writer.total_rows} businesses to {output_file}", file=sys.stderr)
         
     except FileNotFoundError:
         print(f"ERROR: Could not find file '{csv_file}'", file=sys.stderr)
     except Exception as e:
         print(f"ERROR: {str(e)}", file=sys.stderr)
     finally:
-        scraper.close()
+        if writer is not None:
+            writer.close()
+        if place_index is not None:
+            place_index.close()
+        if history is not None:
+            history.close()
     
     return all_businesses
 
 # Main execution
 if __name__ == "__main__":
     import sys
-    import json
     
     # Check if arguments were passed (Node.js integration)
     if len(sys.argv) > 1:
@@ -272,46 +911,103 @@ if __name__ == "__main__":
                 # Parse JSON arguments directly (fallback for compatibility)
                 args = json.loads(arg)
             
+            # Share browsers and request rates with other jobs on this machine
+            job_scheduler.register_job('scrape_google_maps', priority=args.get('priority', 0))
+            
             urls = args.get('urls', [])
             max_results = args.get('maxResults', 20)
             delay_time = args.get('delay', 2)
             headless = args.get('headless', False)
             output_file = args.get('outputFile', 'scraped_results.csv')
+            recycle_after = args.get('recycleAfter', 50)
+            max_rss_mb = args.get('maxRssMb', 1500)
+            pool_size = args.get('poolSize', 1)
+            rate_limit = args.get('rateLimit', 0)
+            feed_first = args.get('feedFirst', True)
+            detail_fields = tuple(args.get('detailFields', CARD_DETAIL_FIELDS))
+            dedupe = args.get('dedupe', True)
+            place_index = PlaceIndex(args.get('placeIndexFile')) if dedupe else None
+            resume = args.get('resume', True)
+            history = ScrapeHistory(args['historyFile'], args.get('freshDays', DEFAULT_FRESH_DAYS)) if args.get('historyFile') else None
             
-            scraper = GoogleMapsScraper(headless=headless)
-            all_businesses = []
+            # Tile mode: rows from the query generator's tile mode, split further when saturated
+            refiner = None
+            tile_rows = args.get('tiles') or (read_tile_rows(args['tileFile']) if args.get('tileFile') else None)
+            if tile_rows:
+                refiner = TileRefiner(tile_rows, TileHistory(args.get('tilePlanFile') or output_file + '.tiles.json'),
+                                      saturation=max_results, min_tile_km=args.get('minTileKm', 0.5))
+                urls = refiner.urls
             
-            print(json.dumps({"status": "starting", "total": len(urls)}), file=sys.stderr)
+            # Results are appended as each search finishes; the journal makes reruns resume
+            writer = IncrementalResultWriter(output_file, resume=resume)
+            pending_urls = refiner.pending(writer.completed_urls) if refiner is not None else writer.pending(urls)
+            already_done = len(writer.completed_urls) if refiner is not None else len(urls) - len(pending_urls)
+            if already_done and place_index is not None:
+                for business in writer.existing_businesses():
+                    place_index.add(business)
+            preview = []
             
-            for idx, url in enumerate(urls, 1):
-                try:
-                    print(json.dumps({"status": "scraping", "current": idx, "total": len(urls)}), file=sys.stderr)
-                    businesses = scraper.scrape_search_results(url, max_results=max_results)
-                    all_businesses.extend(businesses)
-                    
-                    # Send progress update
-                    print(json.dumps({"progress": int((idx / len(urls)) * 100)}), file=sys.stderr)
-                    
-                    # Delay between requests
-                    if idx < len(urls):
-                        time.sleep(delay_time)
-                        
-                except Exception as e:
-                    print(json.dumps({"error": str(e), "url": url}), file=sys.stderr)
-                    continue
+            print(json.dumps({"status": "starting", "total": len(urls), "poolSize": pool_size, "resumed": already_done}), file=sys.stderr)
             
-            scraper.close()
+            def on_result(url, businesses):
+                writer.write(url, businesses)
+                preview.extend(businesses[:10 - len(preview)])
             
-            # Save results
-            save_to_csv(all_businesses, output_file)
+            def on_progress(completed, total, business_count, businesses):
+                current = already_done + completed
+                overall = already_done + total  # Grows as saturated tiles are subdivided
+                print(json.dumps({"status": "scraping", "current": current, "total": overall, "count": writer.total_rows}), file=sys.stderr)
+                
+                # Send progress update
+                print(json.dumps({"progress": int((current / overall) * 100)}), file=sys.stderr)
+            
+            def on_error(url, error):
+                print(json.dumps({"error": str(error), "url": url}), file=sys.stderr)
+            
+            _, driver_stats = scrape_urls(
+                pending_urls,
+                max_results=max_results,
+                pool_size=pool_size,
+                delay=delay_time,
+                rate_limit=rate_limit,
+                headless=headless,
+                recycle_after=recycle_after,
+                max_rss_mb=max_rss_mb,
+                feed_first=feed_first,
+                detail_fields=detail_fields,
+                place_index=place_index,
+                keep_results=False,
+                on_result=on_result,
+                on_progress=on_progress,
+                on_error=on_error,
+                expand=refiner.expand if refiner is not None else None,
+                history=history
+            )
+            writer.close()
+            if history is not None:
+                history.close()
+            if refiner is not None:
+                refiner.history.save()
+            if place_index is not None:
+                place_index.close()
             
             # Return success response as JSON
             result = {
                 "success": True,
-                "count": len(all_businesses),
+                "count": writer.total_rows,
                 "file": output_file,
-                "businesses": all_businesses[:10]  # Preview first 10
+                "businesses": preview,  # Preview first 10
+                "driverRestarts": driver_stats["driverRestarts"],
+                "fairShareYields": driver_stats["fairShareYields"],
+                "driverCrashes": driver_stats["driverCrashes"],
+                "peakRssMb": driver_stats["peakRssMb"],
+                "duplicatesSkipped": place_index.duplicates if place_index is not None else 0
             }
+            if refiner is not None:
+                result["tilesSubdivided"] = refiner.subdivided
+            if history is not None:
+                result["searchesFromHistory"] = history.search_hits
+            result["schedulerWaitSeconds"] = job_scheduler.wait_seconds()
             
             print(json.dumps(result))
             sys.exit(0)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Scrape history store
+Remembers which Google Maps searches and which business websites were
+scraped, when, and what they returned, so incremental campaigns only pay
+for searches and websites that are new or have gone stale. Searches are
+keyed by normalized query, websites by site key (see site_key).
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from urllib.parse import urlparse, unquote_plus
+
+DEFAULT_FRESH_DAYS = 7
+
+# Query parameters that only track where a click came from
+TRACKING_PARAM = re.compile(r'^(utm_[a-z_]+|fbclid|gclid|msclkid)$')
+
+
+def normalize_query(url):
+    """
+    Normalize a Google Maps search URL (or plain query) to a history key
+
+    Case, whitespace, URL encoding and display parameters such as hl/gl are
+    ignored; a map position ("@lat,lng,zoom") is kept since it changes what
+    the search returns.
+    """
+    parsed = urlparse(url.strip())
+    if '/maps/search/' not in parsed.path:
+        return ' '.join(unquote_plus(url).split()).lower()
+
+    parts = parsed.path.split('/maps/search/', 1)[1].split('/')
+    query = ' '.join(unquote_plus(parts[0]).split()).lower()
+    position = next((part for part in parts[1:] if part.startswith('@')), '')
+    return f"{query} {position}".strip()
+
+
+def canonical_domain(website):
+    """Reduce a website URL to its host without scheme, port or leading www."""
+    website = (website or '').strip()
+    if not re.match(r'^[a-z][a-z0-9+.-]*://', website, re.IGNORECASE):
+        website = 'http://' + website
+    host = (urlparse(website).hostname or '').lower().rstrip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+def site_key(website):
+    """
+    Identify the site a business lists as its website
+
+    The canonical domain alone when the website is the host's root, plus the
+    path (and any non-tracking query) otherwise: many businesses list a page
+    on a shared host (facebook.com/joesplumbing, sites.google.com/view/...),
+    and those must not share one entry.
+    """
+    domain = canonical_domain(website)
+    if not domain:
+        return ''
+    website = website.strip()
+    if not re.match(r'^[a-z][a-z0-9+.-]*://', website, re.IGNORECASE):
+        website = 'http://' + website
+    parsed = urlparse(website)
+    path = re.sub(r'/index\.[a-z]+$', '', re.sub(r'/+', '/', parsed.path).lower()).rstrip('/')
+    if not path:
+        return domain
+    params = sorted(param for param in parsed.query.split('&')
+                    if param and not TRACKING_PARAM.match(param.split('=', 1)[0].lower()))
+    return f"{domain}{path}?{'&'.join(params)}" if params else f"{domain}{path}"
+
+
+class ScrapeHistory:
+    def __init__(self, path, fresh_days=DEFAULT_FRESH_DAYS):
+        """
+        Open (or create) a scrape history database
+
+        Args:
+            path: SQLite file holding the history
+            fresh_days: Results younger than this many days are reused instead
+                of scraping again (0 never reuses, but still records)
+        """
+        self.path = path
+        self.max_age = fresh_days * 24 * 3600
+        self.search_hits = 0
+        self.domain_hits = 0
+
+        history_dir = os.path.dirname(path)
+        if history_dir:
+            os.makedirs(history_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS searches (query TEXT PRIMARY KEY, url TEXT, scraped_at REAL, "
+            "card_count INTEGER, result_count INTEGER, results TEXT)"
+        )
+        self.db.execute(
+            # The domain column holds site keys; for sites at a host's root that is the domain
+            "CREATE TABLE IF NOT EXISTS domains (domain TEXT PRIMARY KEY, website TEXT, scraped_at REAL, emails TEXT)"
+        )
+        self.db.commit()
+
+    def _fresh(self, scraped_at):
+        return self.max_age > 0 and time.time() - scraped_at < self.max_age
+
+    def get_search(self, url):
+        """
+        Look up a recent scrape of a search
+
+        Returns:
+            Tuple of (businesses, card_count), or None if the search is
+            unknown or stale
+        """
+        with self.lock:
+            row = self.db.execute("SELECT scraped_at, card_count, results FROM searches WHERE query = ?",
+                                  (normalize_query(url),)).fetchone()
+        if row is None or not self._fresh(row[0]):
+            return None
+        self.search_hits += 1
+        return json.loads(row[2]), row[1]
+
+    def record_search(self, url, businesses, card_count=None):
+        """Store the businesses a search returned"""
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO searches (query, url, scraped_at, card_count, result_count, results) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_query(url), url, time.time(),
+                 len(businesses) if card_count is None else card_count, len(businesses), json.dumps(businesses))
+            )
+            self.db.commit()
+
+    def get_domain(self, website):
+        """Emails found on a recently scraped website ('N/A' if none), or None"""
+        key = site_key(website)
+        if not key:
+            return None
+        with self.lock:
+            row = self.db.execute("SELECT scraped_at, emails FROM domains WHERE domain = ?", (key,)).fetchone()
+        if row is None or not self._fresh(row[0]):
+            return None
+        self.domain_hits += 1
+        return row[1]
+
+    def record_domain(self, website, emails):
+        """Store the emails found on a website, under its site key"""
+        key = site_key(website)
+        if not key:
+            return
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO domains (domain, website, scraped_at, emails) VALUES (?, ?, ?, ?)",
+                (key, website, time.time(), emails)
+            )
+            self.db.commit()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip('selenium')
+
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException  # noqa: E402
+
+from driver_manager import ManagedDriver, is_driver_crash  # noqa: E402
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+
+    def quit(self):
+        self.alive = False
+
+
+class FakeBrowser:
+    """Factory whose drivers crash for the next `crashes` page loads"""
+
+    def __init__(self, crashes=0):
+        self.crashes = crashes
+        self.started = []
+
+    def __call__(self):
+        driver = FakeDriver()
+        self.started.append(driver)
+        return driver
+
+    def load(self, manager):
+        driver = manager.driver
+        if not driver.alive:
+            raise InvalidSessionIdException("invalid session id")
+        if self.crashes:
+            self.crashes -= 1
+            driver.alive = False
+            raise InvalidSessionIdException("invalid session id")
+        return 'page'
+
+
+def _manager(browser, retries=1):
+    return ManagedDriver(browser, recycle_after=0, max_rss_mb=0, max_crash_retries=retries)
+
+
+def test_crash_is_retried_on_fresh_driver():
+    browser = FakeBrowser(crashes=1)
+    manager = _manager(browser)
+    assert manager.run(browser.load, manager) == 'page'
+    assert len(browser.started) == 2
+    assert manager.stats()["driverCrashes"] == 1 and manager.stats()["driverRestarts"] == 1
+
+
+def test_dead_driver_is_replaced_after_retries_run_out():
+    browser = FakeBrowser(crashes=1)
+    manager = _manager(browser, retries=0)
+    with pytest.raises(InvalidSessionIdException):
+        manager.run(browser.load, manager)
+
+    # The next unit of work starts on a fresh browser instead of the dead one
+    assert manager.run(browser.load, manager) == 'page'
+    assert len(browser.started) == 2
+    assert manager.stats()["driverCrashes"] == 1 and manager.stats()["driverRestarts"] == 1
+
+
+def test_ordinary_errors_keep_the_driver():
+    browser = FakeBrowser()
+    manager = _manager(browser)
+
+    def fail():
+        manager.driver
+        raise ValueError("not a crash")
+
+    with pytest.raises(ValueError):
+        manager.run(fail)
+    assert manager.run(browser.load, manager) == 'page'
+    assert len(browser.started) == 1
+
+
+def test_crash_detection():
+    assert is_driver_crash(WebDriverException("unknown error: session deleted because of page crash"))
+    assert is_driver_crash(ConnectionRefusedError())
+    assert not is_driver_crash(WebDriverException("no such element: Unable to locate element"))
+    assert not is_driver_crash(ValueError())
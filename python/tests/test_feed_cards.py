@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip('selenium')
+
+from scrape_google_maps import CARD_DETAIL_FIELDS, GoogleMapsScraper  # noqa: E402
+
+
+class FakeDriver:
+    def __init__(self, cards):
+        self.cards = cards
+
+    def execute_script(self, script, max_results):
+        return self.cards[:max_results]
+
+
+class FakeBrowser:
+    def __init__(self, cards):
+        self.driver = FakeDriver(cards)
+
+
+def _scraper(cards=(), detail_fields=CARD_DETAIL_FIELDS):
+    # Skip __init__, which starts Chrome
+    scraper = GoogleMapsScraper.__new__(GoogleMapsScraper)
+    scraper.browser = FakeBrowser(list(cards))
+    scraper.feed_first = True
+    scraper.detail_fields = detail_fields
+    scraper.place_index = None
+    return scraper
+
+
+CARD = {'name': "Joe's Plumbing", 'phone': '(208) 555-0100', 'website': 'https://joesplumbing.com',
+        'rating': '4.7', 'reviews': '(1,234)', 'info': 'Plumber · 123 Main St', 'place_url': 'https://maps/place/joe'}
+
+
+def test_card_street_is_not_the_address():
+    listing = _scraper([CARD])._extract_feed_cards(20)[0]
+    assert listing['category'] == 'Plumber'
+    assert listing['address'] == 'N/A'
+    assert listing['rating'] == '4.7' and listing['reviews'] == '1234'
+
+
+def test_cards_without_website_or_phone_open_the_panel():
+    scraper = _scraper([CARD, dict(CARD, website=None), dict(CARD, phone=None)])
+    assert [scraper._needs_details(listing) for listing in scraper._extract_feed_cards(20)] == [False, True, True]
+
+
+def test_panel_address_overrides_card_and_fills_missing_fields():
+    scraper = _scraper()
+    card = {'name': "Joe's Plumbing", 'phone': '(208) 555-0100', 'website': 'N/A', 'address': '123 Main St',
+            'reviews': '0'}
+    panel = {'name': "Joe's Plumbing", 'phone': '+1 208-555-0199', 'website': 'https://joesplumbing.com',
+             'address': '123 Main St, Boise, ID 83702', 'reviews': '57'}
+    merged = scraper._merge_details(card, panel)
+    assert merged['address'] == '123 Main St, Boise, ID 83702'
+    assert merged['website'] == 'https://joesplumbing.com'
+    assert merged['phone'] == '(208) 555-0100'
+    assert merged['reviews'] == '57'
+
+    assert scraper._merge_details(card, dict(panel, address='N/A'))['address'] == '123 Main St'
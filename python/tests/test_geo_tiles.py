@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from geo_tiles import (Tile, TileHistory, TileRefiner, grid_tiles, merge_sparse, parent, plan_tiles, subdivide,
+                       tile_url)
+
+
+def tile_row(tile, business_type="plumber"):
+    return {"google_maps_url": tile_url(business_type, tile), "business_type": business_type, "tile_key": tile.key,
+            "latitude": tile.latitude, "longitude": tile.longitude, "size_km": tile.size_km}
+
+
+def test_subdivide_produces_quadrants_that_rebuild_the_parent():
+    tile = Tile("r", 61.2, -149.9, 8.0)
+    children = subdivide(tile)
+    assert [child.key for child in children] == ["r.0", "r.1", "r.2", "r.3"]
+    assert all(child.size_km == 4.0 for child in children)
+    north_west, north_east, south_west, south_east = children
+    assert north_west.latitude > tile.latitude > south_west.latitude
+    assert north_west.longitude < tile.longitude < north_east.longitude
+    for child in children:
+        rebuilt = parent(child)
+        assert rebuilt.key == "r"
+        assert rebuilt.latitude == pytest.approx(tile.latitude)
+        assert rebuilt.longitude == pytest.approx(tile.longitude)
+        assert rebuilt.size_km == tile.size_km
+
+
+def test_grid_tiles_cover_the_area_with_small_tiles():
+    tiles = grid_tiles(43.6, -116.2, radius_km=10, tile_km=5)
+    assert all(tile.size_km <= 5 for tile in tiles)
+    assert len({tile.key for tile in tiles}) == len(tiles)
+    # A 20 km wide circle needs at least (20 / 5) ** 2 * pi / 4 tiles
+    assert len(tiles) >= 12
+
+
+def test_plan_tiles_splits_saturated_tiles():
+    root = Tile("r", 43.6, -116.2, 4.0)
+    history = {"r": 20, "r.1": 20}
+    keys = [tile.key for tile in plan_tiles([root], history, saturation=20, min_tile_km=0.5)]
+    assert keys == ["r.0", "r.1.0", "r.1.1", "r.1.2", "r.1.3", "r.2", "r.3"]
+
+
+def test_plan_tiles_respects_min_tile_size():
+    root = Tile("r", 43.6, -116.2, 0.8)
+    assert [tile.key for tile in plan_tiles([root], {"r": 20}, saturation=20, min_tile_km=0.5)] == ["r"]
+
+
+def test_merge_sparse_restores_the_parent():
+    children = subdivide(Tile("r", 43.6, -116.2, 4.0))
+    history = {child.key: 1 for child in children}
+    merged = merge_sparse(children, history, sparse_below=10)
+    assert [tile.key for tile in merged] == ["r"]
+    # A parent that was itself saturated is never restored
+    history["r"] = 20
+    assert len(merge_sparse(children, history, sparse_below=10, saturation=20)) == 4
+
+
+def test_refiner_expands_saturated_tiles_and_saves_counts(tmp_path):
+    plan = str(tmp_path / 'plan.json')
+    root = Tile("r", 43.6, -116.2, 4.0)
+    refiner = TileRefiner([tile_row(root)], TileHistory(plan), saturation=20)
+    children = refiner.expand(refiner.urls[0], [], 20)
+    assert len(children) == 4
+    assert refiner.expand(children[0], [], 3) == []
+    assert refiner.subdivided == 1
+    # Counts are on disk without an explicit save()
+    assert TileHistory(plan).counts == {"r": 20, "r.0": 3}
+
+
+def test_refiner_resume_searches_quadrants_of_finished_saturated_tiles(tmp_path):
+    plan = str(tmp_path / 'plan.json')
+    root, other = Tile("r", 43.6, -116.2, 4.0), Tile("s", 44.6, -116.2, 4.0)
+    rows = [tile_row(root), tile_row(other)]
+    first = TileRefiner(rows, TileHistory(plan), saturation=20)
+    children = first.expand(first.urls[0], [], 20)
+    first.expand(children[0], [], 5)
+    # Crash here: the root and its first quadrant are journaled, nothing else is
+    completed = {first.urls[0], children[0]}
+
+    resumed = TileRefiner(rows, TileHistory(plan), saturation=20)
+    assert resumed.pending(completed) == children[1:] + [first.urls[1]]
+
+
+def test_tile_history_save_is_atomic(tmp_path):
+    plan = tmp_path / 'plan.json'
+    history = TileHistory(str(plan))
+    history.record(Tile("r", 0, 0, 1), 7)
+    history.save()
+    assert not (tmp_path / 'plan.json.tmp').exists()
+    assert TileHistory(str(plan)).counts == {"r": 7}
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip('requests')
+
+import geonames_client  # noqa: E402
+from geonames_client import GeonamesClient, GeonamesError  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """Answers each request with the next canned payload"""
+
+    def __init__(self, payloads):
+        self.payloads = list(payloads)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return FakeResponse(self.payloads.pop(0))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(geonames_client.time, 'sleep', lambda seconds: None)
+    client = GeonamesClient('demo')
+    yield client
+    client.close()
+
+
+def _status(code):
+    return {"status": {"value": code, "message": f"status {code}"}}
+
+
+@pytest.mark.parametrize('code', [18, 19, 20])
+def test_quota_errors_fail_without_retrying(client, code):
+    client.session = FakeSession([_status(code), {"postalCodes": []}])
+    with pytest.raises(GeonamesError) as error:
+        client.get('findNearbyPostalCodesJSON', {'lat': 43.6, 'lng': -116.2})
+    assert error.value.code == code
+    assert client.session.calls == 1
+
+
+@pytest.mark.parametrize('code', [13, 22])
+def test_busy_errors_are_retried(client, code):
+    client.session = FakeSession([_status(code), _status(code), {"postalCodes": [{"postalCode": "83702"}]}])
+    data = client.get('findNearbyPostalCodesJSON', {'lat': 43.6, 'lng': -116.2})
+    assert data["postalCodes"][0]["postalCode"] == "83702"
+    assert client.session.calls == 3
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import job_scheduler
+from job_scheduler import BROWSER, JobScheduler
+
+
+@pytest.fixture
+def make_job(tmp_path):
+    jobs = []
+
+    def make(name, priority=0, max_browsers=2, domain_interval=0):
+        job = JobScheduler(name, priority=priority, path=str(tmp_path / 'scheduler.db'),
+                           max_browsers=max_browsers, domain_interval=domain_interval)
+        jobs.append(job)
+        return job
+
+    yield make
+    for job in jobs:
+        job.close()
+
+
+def _in_thread(func, *args):
+    """Start func in a thread; the returned dict gets its result under 'value'"""
+    box = {}
+    thread = threading.Thread(target=lambda: box.setdefault('value', func(*args)), daemon=True)
+    thread.start()
+    box['thread'] = thread
+    return box
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_acquire_waits_for_cap_across_jobs(make_job):
+    first, second = make_job('first'), make_job('second')
+    slots = [first.acquire(BROWSER), first.acquire(BROWSER)]
+
+    waiting = _in_thread(second.acquire, BROWSER)
+    time.sleep(0.5)
+    assert 'value' not in waiting
+
+    first.release(slots[0])
+    assert _wait_for(lambda: 'value' in waiting)
+
+
+def test_reserve_is_all_or_nothing(make_job):
+    holder, pipeline = make_job('holder'), make_job('pipeline')
+    held = holder.acquire(BROWSER)
+
+    def reserve_both():
+        with pipeline.reserve(BROWSER, 2):
+            slots = [pipeline.acquire(BROWSER), pipeline.acquire(BROWSER)]
+            count = pipeline.db.execute("SELECT COUNT(*) FROM holders WHERE job_id = ?",
+                                        (pipeline.job_id,)).fetchone()[0]
+            for slot_id in slots:
+                pipeline.release(slot_id)
+            return slots, count
+
+    waiting = _in_thread(reserve_both)
+    time.sleep(0.5)
+    # One slot is free, but the reservation needs both, so it holds neither meanwhile
+    assert 'value' not in waiting
+    assert holder.db.execute("SELECT COUNT(*) FROM holders WHERE job_id = ?",
+                             (pipeline.job_id,)).fetchone()[0] == 0
+
+    holder.release(held)
+    assert _wait_for(lambda: 'value' in waiting)
+    slots, count = waiting['value']
+    assert len(set(slots)) == 2 and count == 2
+    assert holder.db.execute("SELECT COUNT(*) FROM holders").fetchone()[0] == 0
+
+
+def test_single_requests_do_not_overtake_waiting_reservation(make_job):
+    holder, pipeline, latecomer = make_job('holder'), make_job('pipeline'), make_job('latecomer')
+    held = holder.acquire(BROWSER)
+
+    reservation = pipeline.reserve(BROWSER, 2)
+    reserving = _in_thread(reservation.__enter__)
+    time.sleep(0.5)
+    late = _in_thread(latecomer.acquire, BROWSER)
+    time.sleep(0.5)
+    # The free slot stays free for the reservation queued first
+    assert 'value' not in late
+
+    holder.release(held)
+    assert _wait_for(lambda: reserving['thread'].is_alive() is False)
+    assert 'value' not in late
+    reservation.__exit__(None, None, None)
+    assert _wait_for(lambda: 'value' in late)
+
+
+def test_reserve_more_than_cap_is_an_error(make_job):
+    job = make_job('job', max_browsers=2)
+    with pytest.raises(ValueError):
+        with job.reserve(BROWSER, 3):
+            pass
+
+
+def test_reserved_slots_never_yield(make_job):
+    pipeline, other = make_job('pipeline'), make_job('other')
+    with pipeline.reserve(BROWSER, 2):
+        waiting = _in_thread(other.acquire, BROWSER)
+        time.sleep(0.3)
+        assert pipeline.should_yield(BROWSER) is False
+    assert _wait_for(lambda: 'value' in waiting)
+
+
+def test_should_yield_above_fair_share(make_job):
+    greedy, other = make_job('greedy'), make_job('other')
+    slots = [greedy.acquire(BROWSER), greedy.acquire(BROWSER)]
+    assert greedy.should_yield(BROWSER) is False
+
+    waiting = _in_thread(other.acquire, BROWSER)
+    time.sleep(0.3)
+    assert greedy.should_yield(BROWSER) is True
+
+    greedy.release(slots[1])
+    assert _wait_for(lambda: 'value' in waiting)
+    assert greedy.should_yield(BROWSER) is False
+
+
+def test_slots_of_dead_processes_are_reclaimed(make_job, monkeypatch):
+    job = make_job('job', max_browsers=1)
+    with job._transaction() as db:
+        db.execute("INSERT INTO holders (resource, job_id, pid, acquired_at) VALUES (?, 'gone', 999999999, ?)",
+                   (BROWSER, time.time()))
+    monkeypatch.setattr(job_scheduler, '_pid_alive', lambda pid: pid == job.pid)
+
+    job.release(job.acquire(BROWSER))
+    assert job.db.execute("SELECT COUNT(*) FROM holders").fetchone()[0] == 0
+
+
+def test_throttle_spaces_requests_to_a_domain(make_job):
+    job = make_job('job', domain_interval=0.3)
+    started = time.time()
+    for _ in range(3):
+        job.throttle('https://www.example.com/contact')
+    job.throttle('other.example.org')
+    assert time.time() - started >= 0.55
+    assert job.wait_seconds >= 0.55
+
+
+def test_old_database_gains_slots_column(tmp_path):
+    path = str(tmp_path / 'old.db')
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE waiters (id INTEGER PRIMARY KEY AUTOINCREMENT, resource TEXT, job_id TEXT, "
+               "pid INTEGER, priority INTEGER, enqueued_at REAL)")
+    db.commit()
+    db.close()
+
+    job = JobScheduler('job', path=path, max_browsers=1, domain_interval=0)
+    try:
+        with job.reserve(BROWSER, 1):
+            job.release(job.acquire(BROWSER))
+    finally:
+        job.close()
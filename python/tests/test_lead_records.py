@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from lead_records import Lead, LeadTable, is_columnar, read_records, write_records
+
+ROWS = [
+    {'name': "Joe's Plumbing", 'phone': '(208) 555-0100', 'website': 'https://joesplumbing.com', 'rating': '4.5',
+     'reviews': '1,234', 'address': '123 Main St', 'category': 'Plumber', 'place_url': '', 'email': 'N/A'},
+    {'name': 'Ann Drains', 'phone': 'N/A', 'website': 'N/A', 'rating': 'N/A', 'reviews': '0',
+     'address': 'N/A', 'category': 'Plumber', 'place_url': '', 'email': 'ann@anndrains.com'},
+]
+FIELDS = list(ROWS[0])
+
+
+def test_lead_from_dict_types_values_and_drops_missing():
+    lead = Lead.from_dict(ROWS[0])
+    assert lead.rating == 4.5
+    assert lead.reviews == 1234
+    assert lead.email is None
+    assert lead.to_dict()['email'] == 'N/A'
+
+
+def test_lead_table_round_trip():
+    table = LeadTable(ROWS)
+    assert len(table) == 2
+    second = table[1]
+    assert second.rating is None
+    assert second.reviews == 0
+    assert second.website is None
+    assert [lead.name for lead in table] == ["Joe's Plumbing", 'Ann Drains']
+
+
+def test_is_columnar():
+    assert is_columnar('leads.parquet')
+    assert is_columnar('LEADS.ARROW')
+    assert not is_columnar('leads.csv')
+
+
+@pytest.mark.parametrize("extension", [".csv", ".parquet", ".arrow"])
+def test_records_round_trip_in_every_format(tmp_path, extension):
+    if extension != ".csv":
+        pytest.importorskip('pyarrow')
+    path = str(tmp_path / f"leads{extension}")
+    assert write_records(ROWS, path, FIELDS) == 2
+
+    rows = read_records(path)
+    assert [row['name'] for row in rows] == ["Joe's Plumbing", 'Ann Drains']
+    assert rows[1]['website'] == 'N/A'
+    assert rows[1]['email'] == 'ann@anndrains.com'
+
+    leads = LeadTable(rows)
+    assert leads[0].reviews == 1234
+    assert leads[1].rating is None
+
+
+def test_columnar_files_keep_types(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    from lead_records import read_arrow
+    path = str(tmp_path / 'leads.parquet')
+    write_records(ROWS, path, FIELDS)
+    table = read_arrow(path)
+    assert table.schema.field('rating').type == pa.float64()
+    assert table.schema.field('reviews').type == pa.int64()
+    assert table.column('website').to_pylist() == ['https://joesplumbing.com', None]
+
+
+def test_empty_columnar_file_still_has_a_schema(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'leads.arrow')
+    assert write_records([], path, FIELDS) == 0
+    assert read_records(path) == []
+
+
+def test_dataframe_round_trip_stores_missing_as_null(tmp_path):
+    pd = pytest.importorskip('pandas')
+    pytest.importorskip('pyarrow')
+    from lead_records import read_dataframe, write_dataframe
+    path = str(tmp_path / 'leads.parquet')
+    write_dataframe(pd.DataFrame(ROWS), path)
+    df = read_dataframe(path)
+    assert df['website'].isna().tolist() == [False, True]
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from origin_cache import OriginCache
+
+
+@pytest.fixture
+def origins():
+    cache = OriginCache()
+    yield cache
+    cache.close()
+
+
+def test_bare_domain_gets_https(origins):
+    assert origins.canonical_url(" example.com/contact ") == "https://example.com/contact"
+    assert origins.canonical_url("http://example.com") == "http://example.com"
+    assert origins.hits == 0
+
+
+def test_records_scheme_and_www_redirects(origins):
+    origins.record("example.com", "https://www.example.com/home")
+    assert origins.origin("http://example.com/about") == "https://www.example.com"
+    assert origins.canonical_url("example.com/contact?x=1") == "https://www.example.com/contact?x=1"
+    assert origins.hits == 1
+
+    origins.record("http://www.shop.example.org", "https://SHOP.example.org/")
+    assert origins.canonical_url("http://www.shop.example.org/team") == "https://shop.example.org/team"
+
+
+def test_ignores_redirects_to_other_sites(origins):
+    origins.record("acme-plumbing.com", "https://www.hugedomains.com/domain_profile.cfm?d=acme-plumbing.com")
+    origins.record("joes-diner.com", "https://www.facebook.com/joesdiner")
+    origins.record("example.com", "https://blog.example.com/")
+    assert origins.origin("acme-plumbing.com") is None
+    assert origins.origin("joes-diner.com") is None
+    assert origins.origin("example.com") is None
+    assert origins.canonical_url("joes-diner.com") == "https://joes-diner.com"
+
+
+def test_ignores_unusable_final_urls(origins):
+    origins.record("example.com", None)
+    origins.record("example.com", "about:blank")
+    origins.record("", "https://example.com")
+    assert origins.origin("example.com") is None
+
+
+def test_forget_and_ttl(tmp_path):
+    path = str(tmp_path / 'origins.db')
+    cache = OriginCache(path, ttl=3600)
+    cache.record("example.com", "https://www.example.com/")
+    cache.close()
+
+    cache = OriginCache(path, ttl=3600)
+    assert cache.origin("example.com") == "https://www.example.com"
+    cache.forget("http://www.example.com/contact")
+    assert cache.origin("example.com") is None
+
+    cache.record("example.com", "https://www.example.com/")
+    cache.ttl = 0.01
+    time.sleep(0.05)
+    assert cache.origin("example.com") is None
+    cache.close()
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/moved':
+            # Same server under another host name: a different site as far as origins go
+            self.send_response(301)
+            self.send_header('Location', f"http://localhost:{self.server.server_port}/")
+            self.end_headers()
+            return
+        body = b"<html><body>Call us or write to info@acmeplumbing.com</body></html>"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = HTTPServer(('127.0.0.1', 0), _SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scraper(origins):
+    pytest.importorskip('selenium')
+    from scrape_emails import EmailScraper
+    scraper = EmailScraper(use_selenium=False, origin_cache=origins)
+    scraper.session.trust_env = False  # Keep proxies out of requests to the local server
+    return scraper
+
+
+def test_scraper_canonicalizes_website_after_fetch(scraper, origins, site):
+    assert scraper.scrape_website(f"http://{site}/", verify_emails=False) == "info@acmeplumbing.com"
+    assert scraper.last_fetched
+    assert scraper.last_url == f"http://{site}/"
+    assert origins.origin(f"http://{site}/") == f"http://{site}"
+
+
+def test_scraper_ignores_cross_site_redirect(scraper, origins, site):
+    assert scraper.scrape_website(f"http://{site}/moved", verify_emails=False) == "info@acmeplumbing.com"
+    assert scraper.last_url == f"http://{site}/moved"
+    assert origins.origin(f"http://{site}/") is None
+
+
+def test_scraper_keeps_website_and_forgets_origin_when_fetch_fails(scraper, origins, site):
+    dead = "127.0.0.1:9"
+    origins.record(f"http://{dead}/", f"http://{dead}/")
+    assert scraper.scrape_website(dead, verify_emails=False) == 'N/A'
+    assert not scraper.last_fetched
+    assert scraper.last_url == dead
+    assert origins.origin(dead) is None
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from page_archive import PageArchive, latest_visits, new_visit_id, read_index, read_page
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('selenium')
+
+from reextract_emails import reextract_emails  # noqa: E402  (needs pandas and the scraper's dependencies)
+
+
+def _page(*emails):
+    return f"<html><body>{' '.join(f'Write to {email}.' for email in emails)}</body></html>"
+
+
+def _archive_visit(path, site, pages, verified):
+    archive = PageArchive(path)
+    visit = new_visit_id()
+    for page_url, html in pages:
+        archive.add(visit, site, page_url, html, verified=verified)
+    archive.close()
+
+
+def _write_results(path, rows):
+    pd.DataFrame(rows, columns=['name', 'website', 'email']).to_csv(path, index=False)
+
+
+def test_pages_read_back_per_latest_visit(tmp_path):
+    path = str(tmp_path / 'archive')
+    _archive_visit(path, 'example.com', [('https://www.example.com/', _page('old@example.com'))], verified=None)
+    _archive_visit(path, 'http://www.example.com', [
+        ('https://www.example.com/', _page()),
+        ('https://www.example.com/contact', _page('new@example.com')),
+    ], verified=True)
+
+    visits = latest_visits(path)
+    entries = visits['example.com']
+    assert [entry.url for entry in entries] == ['https://www.example.com/', 'https://www.example.com/contact']
+    assert all(entry.verified is True for entry in entries)
+    with open(path + '.pages', 'rb') as pages:
+        assert 'new@example.com' in read_page(pages, entries[1])
+
+
+def test_old_and_torn_index_lines(tmp_path):
+    path = str(tmp_path / 'archive')
+    _archive_visit(path, 'example.com', [('https://example.com/', _page('a@example.com'))], verified=False)
+    with open(path + '.index', 'a', encoding='utf-8') as f:
+        f.write("v1\texample.org\thttps://example.org/\t0\t10\t1700000000\n")  # Written before the verified field
+        f.write("v2\texample.net\thttps://example.net/\t0\t10\t17")  # Torn by a crash mid-write
+
+    entries = list(read_index(path))
+    assert [(entry.site, entry.verified) for entry in entries] == [('example.com', False), ('example.org', None)]
+
+
+def _append_pages(path, writer, count):
+    archive = PageArchive(path)
+    for n in range(count):
+        archive.add(f"{writer}-{n}", f"site{writer}-{n}.com", f"https://site{writer}-{n}.com/",
+                    _page(f"{writer}-{n}@example.com") * 20)
+    archive.close()
+
+
+def test_concurrent_writers_keep_archive_consistent(tmp_path):
+    path = str(tmp_path / 'archive')
+    context = multiprocessing.get_context('spawn')
+    writers = [context.Process(target=_append_pages, args=(path, writer, 150)) for writer in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+        assert writer.exitcode == 0
+
+    entries = list(read_index(path))
+    assert len(entries) == 450
+    with open(path + '.pages', 'rb') as pages:
+        for entry in entries:
+            assert f"{entry.visit}@example.com" in read_page(pages, entry)
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/moved':
+            self.send_response(301)
+            self.send_header('Location', f"http://localhost:{self.server.server_port}/")
+            self.end_headers()
+            return
+        body = _page('info@acmeplumbing.com').encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = HTTPServer(('127.0.0.1', 0), _SiteHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_scraped_pages_reextract_onto_results(tmp_path, site):
+    from scrape_emails import EmailScraper
+
+    path = str(tmp_path / 'archive')
+    archive = PageArchive(path)
+    scraper = EmailScraper(use_selenium=False, archive=archive)
+    scraper.session.trust_env = False
+    website = f"http://{site}/moved"  # Redirects to another host; the archive still files it under this one
+    assert scraper.scrape_website(website, verify_emails=False) == 'info@acmeplumbing.com'
+    archive.close()
+
+    assert latest_visits(path)['127.0.0.1/moved'][0].verified is False
+    results = str(tmp_path / 'results.csv')
+    _write_results(results, [['Acme Plumbing', scraper.last_url, 'sales@acmeplumbing.com'],
+                             ['No Site', 'N/A', 'N/A']])
+
+    stats = reextract_emails(path, results, workers=1)
+    assert stats['sitesReextracted'] == 1 and stats['rowsChanged'] == 1
+    assert stats['rowsVerificationUnknown'] == 0
+    df = pd.read_csv(stats['outputFile'], keep_default_na=False)
+    assert list(df['email']) == ['info@acmeplumbing.com', 'N/A']
+
+
+def test_verified_visits_keep_only_verified_emails_by_default(tmp_path):
+    path = str(tmp_path / 'archive')
+    _archive_visit(path, 'acme.com', [('https://acme.com/', _page('info@acme.com', 'spam@acme.com'))], verified=True)
+    results = str(tmp_path / 'results.csv')
+    _write_results(results, [['Acme', 'https://www.acme.com', 'info@acme.com']])
+
+    stats = reextract_emails(path, results, workers=1)
+    assert stats['rowsChanged'] == 0
+    assert pd.read_csv(stats['outputFile'])['email'][0] == 'info@acme.com'
+
+    stats = reextract_emails(path, results, workers=1, keep_verified=False)
+    assert stats['rowsChanged'] == 1
+    assert pd.read_csv(stats['outputFile'])['email'][0] == 'info@acme.com, spam@acme.com'
+
+
+def test_sites_on_one_host_reextract_separately(tmp_path):
+    path = str(tmp_path / 'archive')
+    _archive_visit(path, 'https://www.facebook.com/joesplumbing',
+                   [('https://www.facebook.com/joesplumbing', _page('joe@joesplumbing.net'))], verified=False)
+    _archive_visit(path, 'https://www.facebook.com/annsbakery',
+                   [('https://www.facebook.com/annsbakery', _page('ann@annsbakery.com'))], verified=False)
+    results = str(tmp_path / 'results.csv')
+    _write_results(results, [['Joe', 'https://facebook.com/joesplumbing/', 'N/A'],
+                             ['Ann', 'https://www.facebook.com/annsbakery', 'N/A'],
+                             ['Bob', 'https://www.facebook.com/bobsbikes', 'N/A']])
+
+    stats = reextract_emails(path, results, workers=1)
+    assert stats['sitesReextracted'] == 2 and stats['rowsChanged'] == 2
+    df = pd.read_csv(stats['outputFile'], keep_default_na=False)
+    assert list(df['email']) == ['joe@joesplumbing.net', 'ann@annsbakery.com', 'N/A']
+
+
+def test_unknown_verification_warns(tmp_path, capsys):
+    path = str(tmp_path / 'archive')
+    _archive_visit(path, 'acme.com', [('https://acme.com/', _page('info@acme.com', 'spam@acme.com'))], verified=None)
+    results = str(tmp_path / 'results.csv')
+    _write_results(results, [['Acme', 'acme.com', 'info@acme.com']])
+
+    stats = reextract_emails(path, results, workers=1)
+    assert stats['rowsVerificationUnknown'] == 1 and stats['rowsChanged'] == 1
+    assert '--keep-verified' in capsys.readouterr().err
+
+
+def test_columnar_missing_emails_are_not_changes(tmp_path):
+    pytest.importorskip('pyarrow')
+    from lead_records import write_dataframe
+
+    path = str(tmp_path / 'archive')
+    _archive_visit(path, 'acme.com', [('https://acme.com/', _page())], verified=False)
+    results = str(tmp_path / 'results.parquet')
+    write_dataframe(pd.DataFrame({'name': ['Acme'], 'website': ['acme.com'], 'email': ['N/A']}), results)
+
+    stats = reextract_emails(path, results, workers=1)
+    assert stats['sitesReextracted'] == 1
+    assert stats['rowsChanged'] == 0 and stats['emailsFound'] == 0
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from place_index import PlaceIndex, place_key
+
+PLACE_URL = ("https://www.google.com/maps/place/Joe's+Plumbing/data=!4m7!3m6"
+             "!1s0x54ae55a3f8b2c1d7:0x9a1b2c3d4e5f6071!8m2!3d43.6!4d-116.2!16s%2Fg%2F11b6!19sChIJabc123XYZ?hl=en")
+
+
+def test_place_key_prefers_place_id():
+    assert place_key({'place_url': PLACE_URL, 'name': "Joe's Plumbing"}) == "place:ChIJabc123XYZ"
+
+
+def test_place_key_falls_back_to_feature_id():
+    url = "https://www.google.com/maps/place/Joe/data=!4m5!3m4!1s0x54ae55a3f8b2c1d7:0x9a1b2c3d4e5f6071!8m2"
+    assert place_key({'place_url': url}) == "place:0x54ae55a3f8b2c1d7:0x9a1b2c3d4e5f6071"
+
+
+def test_place_key_normalizes_name_and_address():
+    first = place_key({'place_url': '', 'name': "Joe's  Plumbing", 'address': '123 Main St.'})
+    second = place_key({'name': "JOE'S PLUMBING", 'address': '123 main st'})
+    assert first == second == "name:joe s plumbing|123 main st"
+
+
+def test_place_key_treats_na_as_missing():
+    assert place_key({'name': 'N/A', 'address': '123 Main St'}) is None
+    assert place_key({'name': 'Joe', 'address': 'N/A'}) == "name:joe|"
+
+
+def test_add_reports_duplicates_once_claimed():
+    index = PlaceIndex()
+    business = {'place_url': PLACE_URL, 'name': 'Joe'}
+    assert not index.contains(business)
+    assert index.add(business)
+    assert not index.add(dict(business, name='Joe (copy)'))
+    assert index.contains(business)
+    assert len(index) == 1
+    assert index.duplicates == 1  # Only add counts duplicates
+
+
+def test_unidentifiable_places_are_always_new():
+    index = PlaceIndex()
+    assert index.add({'name': ''})
+    assert index.add({'name': ''})
+    assert len(index) == 0
+
+
+def test_index_persists_between_runs(tmp_path):
+    path = str(tmp_path / 'places.txt')
+    index = PlaceIndex(path)
+    saved, unsaved = {'place_url': PLACE_URL}, {'name': 'Ann', 'address': '1 Elm St'}
+    assert index.add(saved) and index.add(unsaved)
+    index.persist([saved])
+    index.close()
+
+    # Claims only reach the file through persist
+    reopened = PlaceIndex(path)
+    assert not reopened.add(saved)
+    assert reopened.add(unsaved)
+    reopened.close()
+
+
+def test_discard_releases_claims():
+    index = PlaceIndex()
+    business = {'place_url': PLACE_URL}
+    index.add(business)
+    index.discard([business, {'name': ''}])
+    assert index.add(business)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from postal_index import PostalIndex, build_postal_index, normalize_place
+
+# Geonames postal dump columns: country, postal code, place, admin1 name, admin1 code,
+# admin2 name, admin2 code, admin3 name, admin3 code, latitude, longitude, accuracy
+DUMP_ROWS = [
+    ("US", "83702", "Boise", "Idaho", "ID", 43.6321, -116.2052),
+    ("US", "83704", "Boise", "Idaho", "ID", 43.6330, -116.2870),
+    ("US", "83642", "Meridian", "Idaho", "ID", 43.6150, -116.3980),
+    ("US", "97701", "Bend", "Oregon", "OR", 44.0582, -121.3153),
+    ("US", "83701", "Boise City", "Idaho", "ID", 43.6135, -116.2035),
+    ("FJ", "0001", "Taveuni", "Northern", "N", -16.85, 179.98),
+    ("FJ", "0002", "Rabi", "Northern", "N", -16.85, -179.98),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    dump = tmp_path / 'dump.txt'
+    dump.write_text(''.join(
+        f"{country}\t{postal}\t{place}\t{admin}\t{code}\t\t\t\t\t{lat}\t{lng}\t4\n"
+        for country, postal, place, admin, code, lat, lng in DUMP_ROWS
+    ) + "US\t\tNo Code\tIdaho\tID\t\t\t\t\t43.6\t-116.2\t4\n", encoding='utf-8')
+    path = str(tmp_path / 'postal.idx')
+    assert build_postal_index(str(dump), path) == len(DUMP_ROWS)
+    index = PostalIndex(path)
+    yield index
+    index.close()
+
+
+def test_nearby_returns_codes_within_radius_nearest_first(index):
+    rows = index.nearby(43.6321, -116.2052, radius_km=20)
+    assert [row["postal_code"] for row in rows] == ["83702", "83701", "83704", "83642"]
+    assert rows[0]["distance_km"] == 0.0
+    assert all(row["distance_km"] <= 20 for row in rows)
+    assert "83642" not in [row["postal_code"] for row in index.nearby(43.6321, -116.2052, radius_km=10)]
+
+
+def test_nearby_limits_rows_and_filters_country(index):
+    assert len(index.nearby(43.6321, -116.2052, radius_km=15, max_rows=2)) == 2
+    assert index.nearby(43.6321, -116.2052, radius_km=15, country="CA") == []
+
+
+def test_nearby_wraps_at_antimeridian(index):
+    rows = index.nearby(-16.85, 179.99, radius_km=10)
+    assert {row["postal_code"] for row in rows} == {"0001", "0002"}
+
+
+def test_by_place_matches_normalized_names(index):
+    assert [row["postal_code"] for row in index.by_place("  BOISE ")] == ["83702", "83704"]
+    assert [row["postal_code"] for row in index.by_place("boise-city", admin="Idaho")] == ["83701"]
+    assert index.by_place("Boise", admin="OR") == []
+    assert index.by_place("Nowhere") == []
+
+
+def test_records_carry_centroids(index):
+    record = index.by_place("Bend")[0]
+    assert record["admin_code1"] == "OR"
+    assert record["latitude"] == pytest.approx(44.0582, abs=1e-4)
+    assert record["longitude"] == pytest.approx(-121.3153, abs=1e-4)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'not_an_index.idx'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        PostalIndex(str(path))
+
+
+def test_normalize_place():
+    assert normalize_place("St. Mary's  Point") == "st mary s point"
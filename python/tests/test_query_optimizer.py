@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+from query_optimizer import _coverage_sets, _haversine_km, optimize_zip_coverage
+
+
+def brute_force_covers(points, footprint_km):
+    return [{other for other, (lat2, lng2) in enumerate(points) if _haversine_km(lat, lng, lat2, lng2) <= footprint_km}
+            for lat, lng in points]
+
+
+@pytest.mark.parametrize("center", [
+    (43.6, -116.2),    # Boise
+    (61.2, -149.9),    # Anchorage
+    (64.8, -147.7),    # Fairbanks
+    (-16.8, 179.95),   # Fiji, across the antimeridian
+])
+def test_coverage_sets_match_brute_force(center):
+    rng = random.Random(42)
+    lat0, lng0 = center
+    points = []
+    for _ in range(300):
+        lng = lng0 + rng.uniform(-0.5, 0.5)
+        lng = (lng + 180.0) % 360.0 - 180.0
+        points.append((lat0 + rng.uniform(-0.3, 0.3), lng))
+    assert _coverage_sets(points, 4.0) == brute_force_covers(points, 4.0)
+
+
+def test_coverage_sets_mixed_latitudes():
+    rng = random.Random(7)
+    points = [(rng.uniform(55.0, 70.0), rng.uniform(-150.0, -149.0)) for _ in range(400)]
+    assert _coverage_sets(points, 8.0) == brute_force_covers(points, 8.0)
+
+
+def test_coverage_sets_empty():
+    assert _coverage_sets([], 4.0) == []
+
+
+def zip_record(code, lat=None, lng=None):
+    return {"zip_code": code, "city": "Test", "latitude": lat, "longitude": lng}
+
+
+def test_greedy_picks_the_centre_of_a_cluster():
+    # Four ZIPs ~2 km around a centre ZIP: one search at the centre covers all five
+    records = [zip_record("00000", 43.60, -116.20)] + [
+        zip_record(f"0000{idx}", 43.60 + d_lat, -116.20 + d_lng)
+        for idx, (d_lat, d_lng) in enumerate(((0.018, 0), (-0.018, 0), (0, 0.025), (0, -0.025)), 1)
+    ]
+    selected, report = optimize_zip_coverage(records, footprint_km=2.5)
+    assert [record["zip_code"] for record in selected] == ["00000"]
+    assert report["estimatedCoverage"] == 1.0
+    assert report["reductionFactor"] == 5.0
+
+
+def test_distant_zips_are_all_kept():
+    records = [zip_record("1", 43.6, -116.2), zip_record("2", 44.6, -116.2), zip_record("3", 45.6, -116.2)]
+    selected, report = optimize_zip_coverage(records, footprint_km=4.0)
+    assert len(selected) == 3
+    assert report["estimatedCoverage"] == 1.0
+
+
+def test_partial_target_coverage_stops_early():
+    records = [zip_record(str(idx), 40.0 + idx, -100.0) for idx in range(10)]
+    selected, report = optimize_zip_coverage(records, footprint_km=4.0, target_coverage=0.5)
+    assert len(selected) == 5
+    assert report["estimatedCoverage"] == 0.5
+
+
+def test_unlocated_and_duplicate_zips():
+    records = [zip_record("1", 43.6, -116.2), zip_record("1", 43.6, -116.2), zip_record("2")]
+    selected, report = optimize_zip_coverage(records)
+    assert [record["zip_code"] for record in selected] == ["1", "2"]
+    assert report["originalQueries"] == 3
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from scrape_history import ScrapeHistory, canonical_domain, normalize_query, site_key
+
+
+def test_normalize_query_ignores_case_encoding_and_display_params():
+    first = normalize_query("https://www.google.com/maps/search/Plumbing%2C%2083702%2C%20Boise/?hl=en&gl=US")
+    second = normalize_query("https://www.google.com/maps/search/plumbing,+83702,++boise/")
+    assert first == second == "plumbing, 83702, boise"
+
+
+def test_normalize_query_keeps_map_position():
+    url = "https://www.google.com/maps/search/plumber/@43.600000,-116.200000,14z?hl=en"
+    assert normalize_query(url) == "plumber @43.600000,-116.200000,14z"
+    assert normalize_query(url) != normalize_query("https://www.google.com/maps/search/plumber/@43.7,-116.2,14z")
+
+
+def test_canonical_domain():
+    assert canonical_domain("https://WWW.Example.com:8443/contact?x=1") == "example.com"
+    assert canonical_domain("example.com/about") == "example.com"
+    assert canonical_domain("http://shop.example.com.") == "shop.example.com"
+    assert canonical_domain("") == ""
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ScrapeHistory(str(tmp_path / 'history.db'), fresh_days=7)
+    yield history
+    history.close()
+
+
+def test_searches_are_reused_while_fresh(history, monkeypatch):
+    url = "https://www.google.com/maps/search/plumber/"
+    history.record_search(url, [{'name': 'Joe'}], card_count=20)
+    assert history.get_search(url + "?hl=en") == ([{'name': 'Joe'}], 20)
+
+    later = time.time() + 8 * 24 * 3600
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert history.get_search(url) is None
+    assert history.search_hits == 1
+
+
+def test_site_key():
+    assert site_key("https://WWW.JoesPlumbing.com/?utm_source=gmb") == "joesplumbing.com"
+    assert site_key("joesplumbing.com/index.html") == "joesplumbing.com"
+    assert site_key("https://www.facebook.com/JoesPlumbing/") == "facebook.com/joesplumbing"
+    assert site_key("http://facebook.com//joesplumbing?fbclid=abc") == "facebook.com/joesplumbing"
+    assert site_key("https://m.facebook.com/profile.php?utm_medium=x&id=42") == "m.facebook.com/profile.php?id=42"
+    assert site_key("https://sites.google.com/view/annsbakery/home") == "sites.google.com/view/annsbakery/home"
+    assert site_key("") == ""
+
+
+def test_businesses_on_a_shared_host_keep_their_own_emails(history):
+    history.record_domain("https://www.facebook.com/joesplumbing", "joe@joesplumbing.net")
+    history.record_domain("https://sites.google.com/view/annsbakery", "N/A")
+    assert history.get_domain("facebook.com/joesplumbing/") == "joe@joesplumbing.net"
+    assert history.get_domain("https://facebook.com/annsbakery") is None
+    assert history.get_domain("https://sites.google.com/view/bobsbikes") is None
+    assert history.get_domain("https://sites.google.com/view/annsbakery") == "N/A"
+
+
+def test_domains_are_reused_while_fresh(history, monkeypatch):
+    history.record_domain("https://www.joesplumbing.com/", "joe@joesplumbing.com")
+    assert history.get_domain("joesplumbing.com") == "joe@joesplumbing.com"
+    assert history.get_domain("other.com") is None
+
+    later = time.time() + 8 * 24 * 3600
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert history.get_domain("joesplumbing.com") is None
+
+
+def test_zero_fresh_days_records_but_never_reuses(tmp_path):
+    history = ScrapeHistory(str(tmp_path / 'history.db'), fresh_days=0)
+    history.record_domain("joesplumbing.com", "N/A")
+    assert history.get_domain("joesplumbing.com") is None
+    history.close()
+
+
+def test_history_persists(tmp_path):
+    path = str(tmp_path / 'nested' / 'history.db')
+    history = ScrapeHistory(path)
+    history.record_domain("joesplumbing.com", "N/A")
+    history.close()
+    assert ScrapeHistory(path).get_domain("joesplumbing.com") == "N/A"
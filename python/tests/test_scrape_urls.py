@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip('selenium')
+
+import scrape_google_maps
+from place_index import PlaceIndex
+from scrape_history import ScrapeHistory
+
+
+class FakeScraper:
+    """Stands in for GoogleMapsScraper, serving canned results per URL"""
+    results = {}
+
+    def __init__(self, **options):
+        self.last_card_count = 0
+        self.last_search_complete = False
+
+    def scrape_search_results(self, url, max_results=20):
+        outcome = self.results[url]
+        if isinstance(outcome, Exception):
+            raise outcome
+        # None stands for a search whose results never loaded
+        self.last_search_complete = outcome is not None
+        outcome = outcome or []
+        self.last_card_count = len(outcome)
+        return [dict(business) for business in outcome]
+
+    def driver_stats(self):
+        return {"pagesLoaded": 0, "driverRestarts": 0, "driverCrashes": 0, "fairShareYields": 0, "peakRssMb": 0.0}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_scraper(monkeypatch):
+    monkeypatch.setattr(scrape_google_maps, 'GoogleMapsScraper', FakeScraper)
+    return FakeScraper
+
+
+def business(name):
+    return {'name': name, 'address': f'{name} St', 'website': 'N/A', 'place_url': ''}
+
+
+def test_overlapping_searches_keep_one_copy(fake_scraper):
+    fake_scraper.results = {'a': [business('Joe'), business('Ann')], 'b': [business('Ann'), business('Bob')]}
+    index = PlaceIndex()
+    businesses, _ = scrape_google_maps.scrape_urls(['a', 'b'], delay=0, place_index=index)
+    assert [b['name'] for b in businesses] == ['Joe', 'Ann', 'Bob']
+    assert index.duplicates == 1
+
+
+def test_failed_search_claims_no_places(fake_scraper):
+    fake_scraper.results = {'a': RuntimeError('browser gone'), 'b': [business('Joe')]}
+    errors = []
+    index = PlaceIndex()
+    businesses, _ = scrape_google_maps.scrape_urls(['a', 'b'], delay=0, place_index=index,
+                                                   on_error=lambda url, error: errors.append(url))
+    assert errors == ['a']
+    assert [b['name'] for b in businesses] == ['Joe']
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_failing_callback_does_not_stall_other_workers(fake_scraper):
+    fake_scraper.results = {url: [business(url)] for url in 'abcd'}
+
+    def on_result(url, businesses):
+        if url == 'a':
+            raise ValueError('disk full')
+
+    businesses, _ = scrape_google_maps.scrape_urls(list('abcd'), pool_size=2, delay=0, on_result=on_result)
+    assert {b['name'] for b in businesses} >= {'b', 'c', 'd'}
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_places_are_saved_only_with_their_rows(fake_scraper, tmp_path):
+    path = str(tmp_path / 'places.txt')
+    fake_scraper.results = {'a': [business('Joe')], 'b': [business('Ann')]}
+
+    def on_result(url, businesses):
+        if url == 'a':
+            raise ValueError('disk full')
+
+    index = PlaceIndex(path)
+    scrape_google_maps.scrape_urls(['b', 'a'], delay=0, place_index=index, on_result=on_result)
+    index.close()
+
+    # The resumed run scrapes 'a' again and must keep Joe
+    reopened = PlaceIndex(path)
+    assert reopened.add(business('Joe'))
+    assert not reopened.add(business('Ann'))
+    reopened.close()
+
+
+def test_expand_queues_more_urls(fake_scraper):
+    fake_scraper.results = {'root': [business('x')] * 2, 'child1': [business('y')], 'child2': [business('z')]}
+    seen = []
+
+    def expand(url, businesses, card_count):
+        seen.append((url, card_count))
+        return ['child1', 'child2'] if url == 'root' else []
+
+    businesses, _ = scrape_google_maps.scrape_urls(['root'], delay=0, expand=expand)
+    assert seen == [('root', 2), ('child1', 1), ('child2', 1)]
+    assert [b['name'] for b in businesses] == ['x', 'x', 'y', 'z']
+
+
+def test_history_records_searches_before_dedupe(fake_scraper, tmp_path):
+    fake_scraper.results = {'a': [business('Joe'), business('Ann')], 'b': [business('Ann'), business('Bob')]}
+    history = ScrapeHistory(str(tmp_path / 'history.db'))
+    scrape_google_maps.scrape_urls(['a', 'b'], delay=0, place_index=PlaceIndex(), history=history)
+
+    # A later run re-scraping only 'b' gets Ann back from the history
+    fake_scraper.results = {}
+    businesses, _ = scrape_google_maps.scrape_urls(['b'], delay=0, place_index=PlaceIndex(), history=history)
+    assert [b['name'] for b in businesses] == ['Ann', 'Bob']
+    assert history.search_hits == 1
+
+
+def test_history_skips_timed_out_and_failed_searches(fake_scraper, tmp_path):
+    fake_scraper.results = {'slow': None, 'broken': RuntimeError('crashed')}
+    history = ScrapeHistory(str(tmp_path / 'history.db'))
+    scrape_google_maps.scrape_urls(['slow', 'broken'], delay=0, history=history, on_error=lambda url, error: None)
+    assert history.get_search('slow') is None
+    assert history.get_search('broken') is None
+
+
+@pytest.mark.parametrize("header", ["google_maps_url", "Google Maps URL", " Google Maps URL "])
+@pytest.mark.parametrize("extension", [".csv", ".parquet", ".arrow"])
+def test_read_urls_accepts_both_headers_in_every_format(tmp_path, header, extension):
+    if extension != ".csv":
+        pytest.importorskip('pyarrow')
+    from lead_records import write_records
+    path = str(tmp_path / f"queries{extension}")
+    rows = [{"query": "plumber 83702", header: "https://www.google.com/maps/search/plumber+83702/"},
+            {"query": "empty", header: ""}]
+    write_records(rows, path, ["query", header])
+    assert scrape_google_maps.read_urls_from_csv(path) == ["https://www.google.com/maps/search/plumber+83702/"]